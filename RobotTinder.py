@@ -1,14 +1,54 @@
 import random
-from PyQt5.Qt import *
-from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtWidgets import QApplication
-import requests
+import heapq
+import bisect
 import warnings
-import scipy.sparse
-import numpy as np
-import scipy.sparse.linalg
-import sparse
 import sys
+import time
+import threading
+import contextlib
+import cProfile
+import pstats
+import platform
+import argparse
+import csv
+import concurrent.futures
+import multiprocessing
+import os
+import json
+import re
+import math
+import copy
+import pickle
+import struct
+import hashlib
+import importlib
+import inspect
+import uuid
+from collections import OrderedDict, namedtuple
+
+
+class LazyModule:
+    # Imports the module on first attribute access. numpy, scipy and requests take most of the import
+    # time and aren't needed until there are comparisons to rank or data to fetch. The import is done
+    # under a lock so a worker thread can't see a half imported module.
+    def __init__(self, name, *submodules):
+        self._names = (name,) + submodules
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    for i in self._names:
+                        importlib.import_module(i)
+                    self._module = sys.modules[self._names[0]]
+        return getattr(self._module, attr)
+
+
+np = LazyModule("numpy")
+scipy = LazyModule("scipy", "scipy.sparse", "scipy.sparse.linalg", "scipy.sparse.csgraph")
+requests = LazyModule("requests")
 
 
 def build_from_dense(A, alpha, l0, l1):
@@ -50,38 +90,162 @@ def build_from_sparse(A, alpha, l0, l1):
         A = A.tolil(copy=False)
         A.setdiag(alpha + D1 + A.diagonal())
     else:
-        last_row_plus_col = sparse.COO.from_scipy_sparse(A[n - 1, :] + A[:, n - 1].T)  # create sparse 1d COO array
+        # The Laplacian L is singular, the gauge is fixed with the rank-1 term -1 c^T where c is the last
+        # row of A + A.T. Adding c to every row fills the matrix, so it is kept implicit with a bordered
+        # system and one extra unknown t = c s, which keeps the operator at O(nnz):
+        #   [L    -1] [s]   [B]
+        #   [c^T  -1] [t] = [0]
         A = A + A.T
-
-        A += last_row_plus_col  # broadcast on rows
-        A = -A.tocsr()  # reconvert to csr scipy matrix
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore", scipy.sparse.SparseEfficiencyWarning)
-            A.setdiag(A.diagonal() + D1)
+        L = scipy.sparse.diags(D1.astype(float)) - A
+        c = A[n - 1, :]
+        A = scipy.sparse.bmat([[L, scipy.sparse.csr_matrix(-np.ones((n, 1)))],
+                               [c, scipy.sparse.csr_matrix([[-1.]])]], format='csr')
 
         D3 = np.ones(n) * (l1 * (k_out[n - 1] - k_in[n - 1]))  # to be seen as diagonal matrix, stored as 1d array
-        B = D2 + D3
+        B = np.append(D2 + D3, 0.)
 
     return A, B
 
 
-def solve_linear_system(A, B, solver, verbose):
-    if solver not in ['spsolve', 'bicgstab']:
-        warnings.warn('Unknown parameter {solver} for argument solver. Setting solver = "bicgstab"'.format(solver=solver))
+# systems up to this size are solved by LU factorization when solver='auto', larger ones iteratively.
+# Comparison graphs are expander-like, so LU fill grows quickly and jacobi preconditioned iterations
+# win from a few hundred teams on (see bench_springrank.py)
+direct_max = 200
+# LU factorizations kept for reuse when the same operator is solved again
+factorization_cache_size = 4
+_factorizations = OrderedDict()
+_factorizations_lock = threading.Lock()
+
+
+def _operator_key(A):
+    digest = hashlib.sha1(repr(A.shape).encode())
+    for i in (A.indptr, A.indices, A.data):
+        digest.update(np.ascontiguousarray(i).tobytes())
+    return digest.hexdigest()
+
+
+def factorize(A):
+    # (LU factorization of A, whether it came from the cache)
+    A = A.tocsr()
+    A.sort_indices()
+    key = _operator_key(A)
+    with _factorizations_lock:
+        if key in _factorizations:
+            _factorizations.move_to_end(key)
+            return _factorizations[key], True
+    lu = scipy.sparse.linalg.splu(A.tocsc())
+    with _factorizations_lock:
+        _factorizations[key] = lu
+        while len(_factorizations) > factorization_cache_size:
+            _factorizations.popitem(last=False)
+    return lu, False
+
+
+def clear_factorizations():
+    with _factorizations_lock:
+        _factorizations.clear()
+
+
+def make_preconditioner(A, kind):
+    # approximate inverse of A as a LinearOperator: 'jacobi' (inverse diagonal), 'ilu' (incomplete LU)
+    # or 'amg' (smoothed aggregation, needs the optional pyamg package, falls back to jacobi)
+    if kind is None:
+        return None
+    n = A.shape[0]
+    if kind == 'amg':
+        try:
+            import pyamg
+            return pyamg.smoothed_aggregation_solver(A.tocsr()).aspreconditioner(cycle='V')
+        except ImportError:
+            warnings.warn('pyamg is not installed, using the jacobi preconditioner instead of amg')
+            kind = 'jacobi'
+    if kind == 'ilu':
+        ilu = scipy.sparse.linalg.spilu(A.tocsc(), drop_tol=1e-4, fill_factor=10)
+        return scipy.sparse.linalg.LinearOperator((n, n), ilu.solve)
+    if kind == 'jacobi':
+        d = A.diagonal().astype(float)
+        d[d == 0] = 1.
+        return scipy.sparse.linalg.LinearOperator((n, n), lambda x: x / d)
+    raise ValueError('Unknown preconditioner {0}'.format(kind))
+
+
+def solve_linear_system(A, B, solver='auto', verbose=False, x0=None, tol=1e-8, preconditioner=None, symmetric=None,
+                        diagnostics=None):
+    # solver: 'spsolve' (cached LU), 'cg', 'minres', 'bicgstab' or 'auto', which factorizes systems up to
+    # direct_max unknowns and otherwise uses jacobi preconditioned cg for symmetric systems (alpha > 0,
+    # see build_from_sparse) and jacobi preconditioned bicgstab for the bordered alpha == 0 system.
+    # ilu fills in the dense border row and column of that system, so it is only used when asked for.
+    # cg and minres need a symmetric system, asking for them on a non-symmetric one uses bicgstab instead.
+    # diagnostics, if given, is filled with the solver used, iterations, exit code and relative residual.
+    solvers = ['auto', 'spsolve', 'cg', 'minres', 'bicgstab']
+    if solver not in solvers:
+        warnings.warn('Unknown parameter {solver} for argument solver. Setting solver = "auto"'.format(solver=solver))
+        solver = 'auto'
+    # build_from_sparse returns a lil matrix with alpha != 0, arithmetic and products on it are slow
+    A = scipy.sparse.csr_matrix(A)
+
+    n = A.shape[0]
+    if solver in ('auto', 'cg', 'minres') and (solver != 'auto' or n > direct_max) and symmetric is None:
+        scale = max(abs(A).max(), 1e-300) if A.nnz else 1.
+        symmetric = A.nnz == 0 or abs(A - A.T).max() <= 1e-12 * scale
+    if solver in ('cg', 'minres') and not symmetric:
+        warnings.warn('{0} needs a symmetric system, using bicgstab'.format(solver))
         solver = 'bicgstab'
+    if solver == 'auto':
+        if n <= direct_max:
+            solver = 'spsolve'
+        else:
+            solver = 'cg' if symmetric else 'bicgstab'
+            if preconditioner is None:
+                preconditioner = 'jacobi'
 
     if verbose:
-        print('Using scipy.sparse.linalg.{solver}(A,B)'.format(solver=solver))
+        print('Using scipy.sparse.linalg.{solver}(A,B) preconditioner={preconditioner}'.format(
+            solver=solver, preconditioner=preconditioner))
 
+    info = 0
+    iterations = [0]
+    cached = False
     if solver == 'spsolve':
-        sol = scipy.sparse.linalg.spsolve(A, B)
-    elif solver == 'bicgstab':
-        sol = scipy.sparse.linalg.bicgstab(A, B)[0]
-
-    return sol.reshape((-1,))
-
-
-def SpringRank(A, alpha=0., l0=1., l1=1., solver='bicgstab', verbose=False, force_dense=False):
+        try:
+            lu, cached = factorize(A)
+            sol = lu.solve(np.asarray(B, dtype=float))
+        except RuntimeError as e:
+            # exactly singular, e.g. a disconnected graph with alpha == 0
+            warnings.warn('LU factorization failed ({0}), using bicgstab'.format(e))
+            solver = 'bicgstab'
+    if solver != 'spsolve':
+        def callback(xk):
+            iterations[0] += 1
+
+        method = getattr(scipy.sparse.linalg, solver)
+        kwargs = {_rtol_name(method): tol}
+        if solver != 'minres':
+            # only the relative tolerance decides (minres has no atol)
+            kwargs['atol'] = 0.
+        sol, info = method(A, B, x0=x0, M=make_preconditioner(A, preconditioner), callback=callback, **kwargs)
+        if info != 0:
+            warnings.warn('{0} did not converge (info={1}), the solution may be inaccurate'.format(solver, info))
+    sol = np.asarray(sol).reshape((-1,))
+
+    if diagnostics is not None:
+        diagnostics.update({
+            'solver': solver,
+            'preconditioner': preconditioner if solver != 'spsolve' else None,
+            'iterations': iterations[0],
+            'info': info,
+            'residual': float(np.linalg.norm(A @ sol - B) / max(np.linalg.norm(B), 1e-300)),
+            'cached': cached,
+        })
+    return sol
+
+
+def _rtol_name(method):
+    # the relative tolerance is called rtol since scipy 1.12 and tol before
+    return 'rtol' if 'rtol' in inspect.signature(method).parameters else 'tol'
+
+
+def SpringRank(A, alpha=0., l0=1., l1=1., solver='auto', verbose=False, force_dense=False):
     # check if input is sparse or can be converted to sparse.
     use_sparse = True
     if force_dense and not scipy.sparse.issparse(A):
@@ -93,6 +257,7 @@ def SpringRank(A, alpha=0., l0=1., l1=1., solver='bicgstab', verbose=False, forc
             use_sparse = False
     elif force_dense:
         use_sparse = False
+    n = A.shape[0]
 
     # build array to feed linear system solver
     if use_sparse:
@@ -100,40 +265,1462 @@ def SpringRank(A, alpha=0., l0=1., l1=1., solver='bicgstab', verbose=False, forc
     else:
         A, B = build_from_dense(A, alpha, l0, l1)
 
-    rank = solve_linear_system(A, B, solver, verbose)
+    # with alpha == 0 the sparse system is bordered with one extra unknown, see build_from_sparse
+    rank = solve_linear_system(A, B, solver, verbose)[:n]
 
     return rank
 
 
-pitScoutData = ""
-matchData = ""
-dataIn = ""
+fingerprintModulus = 1 << 128
+
+
+def comparisonHash(betterTeam, worseTeam, weight=1.):
+    # 128 bit hash of one comparison. The fingerprint of a set of comparisons is the sum of these modulo
+    # 2^128, which doesn't depend on the order of the comparisons and is updated in O(1) per comparison.
+    text = "{0}>{1}*{2!r}".format(betterTeam, worseTeam, float(weight))
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=16).digest(), "little")
+
+
+class RankCache:
+    # Bounded LRU of solved rankings keyed by the fingerprint of the comparison set and the solver
+    # parameters, so ranking a set that was ranked before (a reloaded file, another scout's set) is a
+    # lookup. With a directory every entry is also written to disk, keeping the newest diskSize files.
+    def __init__(self, size=32, directory=None, diskSize=1000):
+        self.size = size
+        self.directory = directory
+        self.diskSize = diskSize
+        self.entries = OrderedDict()  # key -> (teams, scores)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.diskCount = None  # files in directory, counted on the first save
+
+    def __deepcopy__(self, memo):
+        # engine copies made by speculate share the cache
+        return self
+
+    @staticmethod
+    def key(fingerprint, **parameters):
+        text = "{0:032x}".format(fingerprint) + "".join(",{0}={1!r}".format(i, parameters[i]) for i in sorted(parameters))
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def get(self, key):
+        # (teams, scores) or None
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        entry = self._load(key)
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, teams, scores):
+        entry = (list(teams), np.array(scores, dtype=float))
+        with self.lock:
+            self._remember(key, entry)
+        if self.directory is not None:
+            self._save(key, entry)
+
+    def _remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        path = os.path.join(self.directory, key + ".npz")
+        try:
+            with np.load(path) as data:
+                entry = data["teams"].tolist(), data["scores"]
+            # files are pruned oldest first, so a hit counts as a use
+            os.utime(path)
+            return entry
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save(self, key, entry):
+        path = os.path.join(self.directory, key + ".npz")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + ".tmp", "wb") as file:
+                np.savez(file, teams=np.asarray(entry[0]), scores=entry[1])
+            added = not os.path.exists(path)
+            os.replace(path + ".tmp", path)
+            # the directory is only listed when the file count goes over diskSize
+            with self.lock:
+                if self.diskCount is None:
+                    self.diskCount = sum(1 for i in os.listdir(self.directory) if i.endswith(".npz"))
+                elif added:
+                    self.diskCount += 1
+                if self.diskCount <= self.diskSize:
+                    return
+                files = [os.path.join(self.directory, i) for i in os.listdir(self.directory) if i.endswith(".npz")]
+                files.sort(key=os.path.getmtime)
+                for i in files[:len(files) - self.diskSize]:
+                    os.remove(i)
+                self.diskCount = min(len(files), self.diskSize)
+        except OSError as e:
+            print(e)
+
+
+class ComparisonStore:
+    # Comparisons kept as coordinate arrays with a team -> index dict so the SpringRank input can be
+    # built straight from them, without a dense n x n matrix or a list.index lookup per comparison
+    def __init__(self):
+        self.teams = []
+        self.teamIndex = {}
+        self.rows = []  # index of the better team
+        self.cols = []  # index of the worse team
+        self.weights = []
+        self.fingerprint = 0  # see comparisonHash
+        self._adjacency = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def index(self, team):
+        if team not in self.teamIndex:
+            self.teamIndex[team] = len(self.teams)
+            self.teams.append(team)
+        return self.teamIndex[team]
+
+    def add(self, betterTeam, worseTeam, weight=1.):
+        i = self.index(betterTeam)
+        j = self.index(worseTeam)
+        self.rows.append(i)
+        self.cols.append(j)
+        self.weights.append(weight)
+        self.fingerprint = (self.fingerprint + comparisonHash(betterTeam, worseTeam, weight)) % fingerprintModulus
+        return i, j
+
+    def extend(self, comparisons):
+        for i in comparisons:
+            self.add(i[0], i[1])
+
+    def adjacency(self):
+        # repeated comparisons are summed into the edge weight by the COO -> CSR conversion. The
+        # matrix is kept until the next comparison so engines sharing the store build it once,
+        # callers must not modify it.
+        if self._adjacency is None or self._adjacency[0] != len(self.rows):
+            n = len(self.teams)
+            A = scipy.sparse.coo_matrix((self.weights, (self.rows, self.cols)), shape=(n, n)).tocsr()
+            self._adjacency = (len(self.rows), A)
+        return self._adjacency[1]
+
+
+class RankingEngine:
+    # Common interface of the ranking engines. Comparisons live in a ComparisonStore that several
+    # engines can share: sync appends the comparisons not seen yet to the store, refresh lets an
+    # engine consume the store entries added since its last call (also ones added by someone else),
+    # and solve returns one score per team, in store.teams order, higher is better.
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else ComparisonStore()
+        self.consumed = 0  # length of the comparison list last given to sync
+        self.seen = 0  # store entries consumed by this engine
+        self.iterations = 0
+        self.info = 0
+        self.residual = 0.
+
+    @property
+    def teams(self):
+        return self.store.teams
+
+    @property
+    def teamIndex(self):
+        return self.store.teamIndex
+
+    def addComparison(self, betterTeam, worseTeam, weight=1.):
+        self.store.add(betterTeam, worseTeam, weight)
+        self.refresh()
+
+    def sync(self, comparisons):
+        # comparisons is only ever appended to, so just consume the entries not seen yet
+        self.store.extend(comparisons[self.consumed:])
+        self.consumed = len(comparisons)
+        self.refresh()
+
+    def refresh(self):
+        start = self.seen
+        self.seen = len(self.store)
+        self._grow()
+        self.consume(start, self.seen)
+
+    def consume(self, start, end):
+        rows, cols, weights = self.store.rows, self.store.cols, self.store.weights
+        for k in range(start, end):
+            self.update(rows[k], cols[k], weights[k])
+
+    def _grow(self):
+        pass
+
+    def update(self, i, j, weight):
+        pass
+
+    def solve(self):
+        raise NotImplementedError
+
+    def speculate(self, betterTeam, worseTeam, weight=1.):
+        # (teams, scores) with one more comparison, leaving the engine as it is. Fits a copy of the
+        # engine, engines override it where the comparison can be applied and taken back cheaply.
+        engine = copy.deepcopy(self)
+        engine.addComparison(betterTeam, worseTeam, weight)
+        return list(engine.teams), engine.solve().copy()
+
+
+class IncrementalSpringRank(RankingEngine):
+    # Keeps the assembled SpringRank system between calls. A comparison better>worse only changes
+    # the two degrees, the two off diagonal entries between the teams and two entries of B, so the
+    # operator is updated in place. Connected components of the comparison graph are solved as
+    # independent blocks, each with its own gauge (mean 0 with alpha == 0), and only components touched
+    # by a comparison since the last solve are solved again, the others keep their cached scores.
+    # Small components are solved directly, large ones with jacobi preconditioned cg warm-started from
+    # the previous ranking.
+    # more new comparisons than this at once (e.g. a loaded file) rebuild the system from the store
+    batchSize = 16
+    # components up to this many teams are stacked into one block diagonal system and solved directly
+    smallComponent = 64
+
+    def __init__(self, alpha=0., l0=1., l1=1., store=None, cache=None):
+        super().__init__(store)
+        self.alpha = alpha
+        self.l0 = l0
+        self.l1 = l1
+        self.cache = cache  # optional RankCache
+        self._speculative = 0  # hash of the comparison speculate applies on top of the store
+        self.laplacian = scipy.sparse.lil_matrix((0, 0))
+        self.B = np.zeros(0)
+        self.rank = np.zeros(0)
+        self.labels = np.zeros(0, dtype=int)  # component of every team at the last solve
+        self.componentCount = 0
+        self.dirty = set()  # teams touched since the last solve
+        self.solver = None  # solver of the last block solved
+
+    def _grow(self):
+        n = len(self.teams)
+        if self.laplacian.shape[0] < n:
+            self.laplacian.resize((n, n))
+            self.B = np.append(self.B, np.zeros(n - len(self.B)))
+        added = n - len(self.rank)
+        if added <= 0:
+            return
+        # new teams start at the level SpringRank pulls unconnected teams towards
+        self.rank = np.append(self.rank, np.full(added, self.l0 if self.alpha != 0. else 0.))
+
+    def _assemble(self):
+        # cold build of the whole system from the store, used when many comparisons arrive at once
+        A = self.store.adjacency()
+        k_in = np.asarray(A.sum(0)).ravel()
+        k_out = np.asarray(A.sum(1)).ravel()
+        self.laplacian = (scipy.sparse.diags(k_in + k_out) - (A + A.T)).tolil()
+        self.B = self.l1 * (k_out - k_in)
+        self._grow()
+        self.dirty = set(range(len(self.teams)))
+
+    def consume(self, start, end):
+        if end - start > self.batchSize:
+            self._assemble()
+        else:
+            super().consume(start, end)
+
+    def update(self, i, j, weight):
+        # rank-2 update of the Laplacian: weight * (e_i - e_j)(e_i - e_j)^T
+        self.laplacian[i, i] += weight
+        self.laplacian[j, j] += weight
+        self.laplacian[i, j] -= weight
+        self.laplacian[j, i] -= weight
+        self.B[i] += self.l1 * weight
+        self.B[j] -= self.l1 * weight
+        self.dirty.update((i, j))
+
+    def speculate(self, betterTeam, worseTeam, weight=1.):
+        if betterTeam not in self.teamIndex or worseTeam not in self.teamIndex:
+            return super().speculate(betterTeam, worseTeam, weight)
+        i = self.teamIndex[betterTeam]
+        j = self.teamIndex[worseTeam]
+        saved = (self.rank.copy(), self.labels, self.componentCount, set(self.dirty), self.iterations, self.info, self.residual)
+        self.update(i, j, weight)
+        self._speculative = comparisonHash(betterTeam, worseTeam, weight)
+        try:
+            rank = self.solve().copy()
+        finally:
+            self._speculative = 0
+            # the rank-2 update is undone exactly by its negative
+            self.update(i, j, -weight)
+            self.rank, self.labels, self.componentCount, self.dirty, self.iterations, self.info, self.residual = saved
+        return list(self.teams), rank
+
+    def cacheKey(self):
+        fingerprint = (self.store.fingerprint + self._speculative) % fingerprintModulus
+        return RankCache.key(fingerprint, engine="springrank", alpha=self.alpha, l0=self.l0, l1=self.l1, solver="auto")
+
+    def solve(self):
+        if len(self.teams) == 0 or not self.dirty:
+            return self.rank
+        A = self.laplacian.tocsr()
+        # entries taken back by speculate stay as explicit zeros, which csgraph would count as edges
+        A.eliminate_zeros()
+        self.componentCount, self.labels = scipy.sparse.csgraph.connected_components(A, directed=False)
+        self.iterations = 0
+        self.info = 0
+        self.residual = 0.
+        if self.cache is not None:
+            key = self.cacheKey()
+            cached = self.cache.get(key)
+            if cached is not None:
+                position = dict(zip(*cached))
+                if len(position) == len(self.teams) and all(team in position for team in self.teams):
+                    self.rank = np.array([position[team] for team in self.teams], dtype=float)
+                    self.dirty.clear()
+                    return self.rank
+        order = np.argsort(self.labels, kind="stable")
+        bounds = np.searchsorted(self.labels[order], np.arange(self.componentCount + 1))
+        small = []
+        for label in np.unique(self.labels[list(self.dirty)]):
+            members = order[bounds[label]:bounds[label + 1]]
+            if len(members) <= self.smallComponent:
+                small.append(members)
+            else:
+                self._solveComponents(A, [members], False)
+        if small:
+            self._solveComponents(A, small, True)
+        self.dirty.clear()
+        if self.cache is not None:
+            self.cache.put(key, self.teams, self.rank)
+        return self.rank
+
+    def _solveComponents(self, A, groups, direct):
+        # groups are whole components, so the rows and columns of their teams form a block diagonal system
+        members = np.concatenate(groups)
+        if self.alpha != 0.:
+            free = members
+        else:
+            # the Laplacian of a component is singular, pin its first team to 0 and centre it afterwards
+            pinned = np.array([group[0] for group in groups])
+            free = np.concatenate([group[1:] for group in groups])
+            if not direct:
+                self.rank[free] -= self.rank[pinned[0]]
+            self.rank[pinned] = 0.
+        if len(free) > 0:
+            M = A[free][:, free]
+            B = self.B[free]
+            if self.alpha != 0.:
+                M = M + self.alpha * scipy.sparse.identity(len(free), format='csr')
+                B = B + self.alpha * self.l0
+            self.rank[free] = self._solve(M, B, self.rank[free], direct)
+        if self.alpha == 0.:
+            labels = self.labels[members]
+            means = np.bincount(labels, self.rank[members]) / np.maximum(np.bincount(labels), 1)
+            self.rank[members] -= means[labels]
+
+    def _solve(self, A, B, x0, direct):
+        # adds up iterations and keeps the worst exit code and relative residual of a solve for the timings panel.
+        # Every block is symmetric (positive definite once a team is pinned), so large ones use cg.
+        diagnostics = {}
+        sol = solve_linear_system(A, B, 'spsolve' if direct else 'auto', x0=x0, symmetric=True, diagnostics=diagnostics)
+        self.info = max(self.info, diagnostics['info'])
+        self.iterations += diagnostics['iterations']
+        self.residual = max(self.residual, diagnostics['residual'])
+        self.solver = diagnostics['solver']
+        return sol
+
+
+class BradleyTerryEngine(RankingEngine):
+    # Bradley-Terry strengths fitted with Hunter's MM iteration, vectorized over the sparse win counts
+    # of the store and warm-started from the previous fit. Every team also plays prior virtual games
+    # (one win, one loss) against a team of strength 1, so teams that never won or never lost keep a
+    # finite score and the scale is fixed. Scores are log strengths.
+    def __init__(self, store=None, prior=0.5, tol=1e-8, maxIterations=1000):
+        super().__init__(store)
+        self.prior = prior
+        self.tol = tol
+        self.maxIterations = maxIterations
+        self.rank = np.zeros(0)
+
+    def _grow(self):
+        added = len(self.teams) - len(self.rank)
+        if added > 0:
+            self.rank = np.append(self.rank, np.zeros(added))
+
+    def solve(self):
+        n = len(self.teams)
+        if n == 0:
+            return self.rank
+        A = self.store.adjacency()
+        wins = np.asarray(A.sum(1)).ravel() + self.prior
+        games = (A + A.T).tocoo()
+        p = np.exp(self.rank)
+        self.info = 1
+        for self.iterations in range(1, self.maxIterations + 1):
+            denominator = np.bincount(games.row, games.data / (p[games.row] + p[games.col]), n)
+            new = wins / (denominator + 2 * self.prior / (p + 1))
+            change = np.max(np.abs(np.log(new) - np.log(p)))
+            p = new
+            if change < self.tol:
+                self.info = 0
+                break
+        self.residual = float(change)
+        self.rank = np.log(p)
+        return self.rank
+
+
+class EloEngine(RankingEngine):
+    # Streaming Elo: every comparison moves the two ratings by k times how unexpected the result was.
+
+    def __init__(self, store=None, k=32., scale=400., initial=1500.):
+        super().__init__(store)
+        self.k = k
+        self.scale = scale
+        self.initial = initial
+        self.rating = []
+
+    def _grow(self):
+        self.rating.extend([self.initial] * (len(self.teams) - len(self.rating)))
+
+    def update(self, i, j, weight):
+        expected = 1 / (1 + 10 ** ((self.rating[j] - self.rating[i]) / self.scale))
+        delta = self.k * weight * (1 - expected)
+        self.rating[i] += delta
+        self.rating[j] -= delta
+
+    def speculate(self, betterTeam, worseTeam, weight=1.):
+        if betterTeam not in self.teamIndex or worseTeam not in self.teamIndex:
+            return super().speculate(betterTeam, worseTeam, weight)
+        saved = list(self.rating)
+        self.update(self.teamIndex[betterTeam], self.teamIndex[worseTeam], weight)
+        rating, self.rating = self.rating, saved
+        return list(self.teams), np.array(rating)
+
+    def solve(self):
+        return np.array(self.rating)
+
+
+class GaussianSkillEngine(RankingEngine):
+    # TrueSkill-style online updates for two teams without draws: a team's skill is a Gaussian and a
+    # comparison is folded in by moment matching the truncated Gaussian of the performance difference.
+    # tau is added to the skill deviation before every update so skills can still move late in an event,
+    # weights are applied as repeated comparisons. Scores are the skill means.
+
+    def __init__(self, store=None, mu=25., sigma=25. / 3, beta=25. / 6, tau=25. / 300):
+        super().__init__(store)
+        self.mu0 = mu
+        self.sigma0 = sigma
+        self.beta = beta
+        self.tau = tau
+        self.mu = []
+        self.variance = []
+
+    def _grow(self):
+        added = len(self.teams) - len(self.mu)
+        self.mu.extend([self.mu0] * added)
+        self.variance.extend([self.sigma0 ** 2] * added)
+
+    def update(self, i, j, weight):
+        for _ in range(max(1, int(round(weight)))):
+            vi = self.variance[i] + self.tau ** 2
+            vj = self.variance[j] + self.tau ** 2
+            c2 = 2 * self.beta ** 2 + vi + vj
+            c = math.sqrt(c2)
+            t = (self.mu[i] - self.mu[j]) / c
+            cdf = 0.5 * math.erfc(-t / math.sqrt(2))
+            # v = pdf(t) / cdf(t), which tends to -t when the winner was far behind
+            v = math.exp(-t * t / 2) / math.sqrt(2 * math.pi) / cdf if cdf > 1e-300 else -t
+            w = v * (v + t)
+            self.mu[i] += vi / c * v
+            self.mu[j] -= vj / c * v
+            self.variance[i] = vi * (1 - vi / c2 * w)
+            self.variance[j] = vj * (1 - vj / c2 * w)
+
+    def speculate(self, betterTeam, worseTeam, weight=1.):
+        if betterTeam not in self.teamIndex or worseTeam not in self.teamIndex:
+            return super().speculate(betterTeam, worseTeam, weight)
+        saved = (list(self.mu), list(self.variance))
+        self.update(self.teamIndex[betterTeam], self.teamIndex[worseTeam], weight)
+        mu = self.mu
+        self.mu, self.variance = saved
+        return list(self.teams), np.array(mu)
+
+    def solve(self):
+        return np.array(self.mu)
+
+
+rankingEngines = {
+    "springrank": IncrementalSpringRank,
+    "bradley-terry": BradleyTerryEngine,
+    "elo": EloEngine,
+    "gaussian": GaussianSkillEngine,
+}
+
+
+def makeEngine(name="springrank", alpha=0., store=None, cache=None):
+    # alpha and the RankCache only apply to SpringRank, the other engines are used with their defaults
+    if name == "springrank":
+        return IncrementalSpringRank(alpha=alpha, store=store, cache=cache)
+    return rankingEngines[name](store=store)
+
+
+def kendallTau(x, y):
+    # Kendall tau-b between two score vectors over the same teams, O(n^2)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    i, j = np.triu_indices(len(x), 1)
+    dx = np.sign(x[i] - x[j])
+    dy = np.sign(y[i] - y[j])
+    denominator = math.sqrt(np.count_nonzero(dx) * np.count_nonzero(dy))
+    return float(np.sum(dx * dy) / denominator) if denominator else 0.
+
+
+def compareEngines(comparisons, names=None, alpha=0.):
+    # (teams, {name: scores}) with every engine reading the same store
+    store = ComparisonStore()
+    store.extend(comparisons)
+    scores = {}
+    for name in names or list(rankingEngines):
+        engine = makeEngine(name, alpha, store)
+        engine.refresh()
+        scores[name] = engine.solve().copy()
+    return list(store.teams), scores
+
+
+class ComparisonLedger:
+    # Bookkeeping for the comparisons shown so far, updated incrementally as comparisons are appended:
+    # an unordered pair index, the sorted set of teams, how often each team has been compared and a
+    # union-find of the connected components of the comparison graph.
+    def __init__(self):
+        self.pairs = {}  # frozenset({team1, team2}) -> number of comparisons
+        self.teams = []  # sorted
+        self.counts = {}
+        self.consumed = 0
+        self.componentCount = 0
+        self._heap = []
+        self._tieBreak = {}
+        self._parent = {}
+
+    def __contains__(self, pair):
+        return frozenset(pair) in self.pairs
+
+    def __len__(self):
+        return self.consumed
+
+    def addTeams(self, teams):
+        for team in teams:
+            if team not in self.counts:
+                self.counts[team] = 0
+                bisect.insort(self.teams, team)
+                # random tie break so uncompared teams are not always paired in team number order
+                self._tieBreak[team] = random.random()
+                heapq.heappush(self._heap, (0, self._tieBreak[team], team))
+                self._parent[team] = team
+                self.componentCount += 1
+
+    def copy(self):
+        # an independent ledger in the same state, to try out a comparison without recording it
+        other = ComparisonLedger()
+        other.pairs = dict(self.pairs)
+        other.teams = list(self.teams)
+        other.counts = dict(self.counts)
+        other.consumed = self.consumed
+        other.componentCount = self.componentCount
+        other._heap = list(self._heap)
+        other._tieBreak = dict(self._tieBreak)
+        other._parent = dict(self._parent)
+        return other
+
+    def find(self, team):
+        # root of the component of team, with path halving
+        parent = self._parent
+        while parent[team] != team:
+            parent[team] = parent[parent[team]]
+            team = parent[team]
+        return team
+
+    def components(self):
+        # [[team, ...], ...] smallest first, only needed while the graph is still split
+        groups = {}
+        for team in self.teams:
+            groups.setdefault(self.find(team), []).append(team)
+        return sorted(groups.values(), key=len)
+
+    def append(self, betterTeam, worseTeam):
+        self.addTeams((betterTeam, worseTeam))
+        root1 = self.find(betterTeam)
+        root2 = self.find(worseTeam)
+        if root1 != root2:
+            self._parent[root1] = root2
+            self.componentCount -= 1
+        pair = frozenset((betterTeam, worseTeam))
+        self.pairs[pair] = self.pairs.get(pair, 0) + 1
+        for team in pair:
+            self.counts[team] += 1
+            heapq.heappush(self._heap, (self.counts[team], self._tieBreak[team], team))
+        self.consumed += 1
+
+    def sync(self, comparisons):
+        # comparisons is only ever appended to, so just consume the entries not seen yet
+        for i in comparisons[self.consumed:]:
+            self.append(i[0], i[1])
+
+    def leastCompared(self, k):
+        # up to k teams with the fewest comparisons, stale heap entries are dropped lazily
+        out = []
+        while self._heap and len(out) < k:
+            entry = heapq.heappop(self._heap)
+            if self.counts[entry[2]] == entry[0]:
+                out.append(entry)
+        for entry in out:
+            heapq.heappush(self._heap, entry)
+        return [entry[2] for entry in out]
+
+
+class PairSelector:
+    # Base pair selection engine, subclasses implement select(teams, scores) with the current
+    # SpringRank ranking. Counts and seen pairs come from the ledger so a choice never rescans
+    # the comparison list.
+    def __init__(self, ledger):
+        self.ledger = ledger
+
+    def isSeen(self, team1, team2):
+        return (team1, team2) in self.ledger
+
+    def select(self, teams, scores):
+        raise NotImplementedError
+
+
+class LeastComparedPairSelector(PairSelector):
+    # pairs the two least compared teams that have not been compared with each other yet
+    def select(self, teams, scores):
+        k = 2
+        while True:
+            candidates = self.ledger.leastCompared(k)
+            for i in range(1, len(candidates)):
+                for j in range(i):
+                    if not self.isSeen(candidates[i], candidates[j]):
+                        return candidates[j], candidates[i]
+            if len(candidates) < k:
+                # the comparison graph is complete, repeat the two least compared teams
+                return (candidates[0], candidates[1]) if len(candidates) >= 2 else None
+            k *= 2
+
+
+class ClosestScorePairSelector(PairSelector):
+    # Uncompared teams are paired with each other first. A single uncompared team is paired with the
+    # median team. While the comparison graph is split, the smallest component is bridged to the largest,
+    # as scores of different components can't be compared. After that the unseen pair of teams with the
+    # closest SpringRank scores is shown, as that is the comparison the ranking is least sure about.
+    def select(self, teams, scores):
+        least = self.ledger.leastCompared(2)
+        if len(least) < 2:
+            return None
+        if self.ledger.counts[least[1]] == 0 or len(teams) < 2:
+            return least[0], least[1]
+
+        scores = np.asarray(scores)
+        order = np.argsort(scores)
+        if self.ledger.counts[least[0]] == 0:
+            return least[0], teams[order[len(order) // 2]]
+
+        if self.ledger.componentCount > 1:
+            components = self.ledger.components()
+            return self.medianTeam(components[0], teams, scores), self.medianTeam(components[-1], teams, scores)
+
+        for k in np.argsort(np.diff(scores[order]), kind="stable"):
+            team1 = teams[order[k]]
+            team2 = teams[order[k + 1]]
+            if not self.isSeen(team1, team2):
+                return team1, team2
+
+        # every neighbouring pair was compared, find the closest unseen opponent of a least compared team
+        position = {team: k for k, team in enumerate(teams)}
+        for team in self.ledger.leastCompared(len(self.ledger.counts)):
+            if team not in position:
+                continue
+            for k in np.argsort(np.abs(scores - scores[position[team]])):
+                if teams[k] != team and not self.isSeen(team, teams[k]):
+                    return team, teams[k]
+        # the comparison graph is complete, repeat the closest pair
+        k = int(np.argmin(np.diff(scores[order])))
+        return teams[order[k]], teams[order[k + 1]]
+
+    def medianTeam(self, component, teams, scores):
+        # the team of a component in the middle of its scores, teams the last solve didn't see sort first
+        position = {team: k for k, team in enumerate(teams)}
+        ranked = sorted(component, key=lambda team: scores[position[team]] if team in position else -np.inf)
+        return ranked[len(ranked) // 2]
+
+
+class Timings:
+    # Per-stage spans and counters for the click to next pair path, shown in the status panel and
+    # exportable as JSON. Worker threads record into it too, so updates are behind a lock. With
+    # ROBOTTINDER_PROFILE=<file> set every stage also runs under cProfile, dumped to that file on exit.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.profilePath = os.environ.get("ROBOTTINDER_PROFILE")
+        self.profiles = []
+        self.profiling = False  # a span is running under cProfile
+
+    @contextlib.contextmanager
+    def span(self, name):
+        profile = None
+        # cProfile can't be nested and from Python 3.12 on only one profiler can be active in the whole
+        # process, so only one span profiles at a time, nested and concurrent spans are only timed
+        if self.profilePath:
+            with self.lock:
+                if not self.profiling:
+                    self.profiling = True
+                    profile = cProfile.Profile()
+            if profile is not None:
+                try:
+                    profile.enable()
+                except ValueError:
+                    # another profiling tool is active
+                    profile = None
+                    with self.lock:
+                        self.profiling = False
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+            if profile is not None:
+                profile.disable()
+                with self.lock:
+                    self.profiles.append(profile)
+                    self.profiling = False
+
+    def record(self, name, seconds):
+        with self.lock:
+            stage = self.stages.setdefault(name, {"last": 0., "count": 0, "total": 0., "max": 0.})
+            stage["last"] = seconds
+            stage["count"] += 1
+            stage["total"] += seconds
+            stage["max"] = max(stage["max"], seconds)
+
+    def count(self, **counters):
+        with self.lock:
+            self.counters.update(counters)
+
+    def summary(self):
+        with self.lock:
+            lines = ["{0}: {1:.1f} ms (avg {2:.1f})".format(name, stage["last"] * 1000, stage["total"] / stage["count"] * 1000)
+                     for name, stage in self.stages.items()]
+            lines += ["{0}: {1:.3g}".format(name, value) for name, value in self.counters.items()]
+        return "\n".join(lines)
+
+    def export(self, path):
+        with self.lock:
+            data = {"stages": self.stages, "counters": self.counters}
+            with open(path, 'w') as file:
+                json.dump(data, file, indent=1)
+
+    def dumpProfile(self):
+        with self.lock:
+            if self.profilePath and self.profiles:
+                pstats.Stats(*self.profiles).dump_stats(self.profilePath)
+
+
+timings = Timings()
+
+
+# dropped: resamples whose solve did not converge, left out of samples. split: with alpha == 0, resamples
+# in samples whose graph has more connected components than the original one, their scores across the
+# split are only defined up to a shift of each part
+BootstrapResult = namedtuple("BootstrapResult", ["teams", "scores", "lower", "upper", "samples", "dropped", "split"])
+
+
+class LaplacianPattern:
+    # Sparsity pattern of the SpringRank Laplacian for a fixed list of comparisons. Resampling the
+    # comparisons only changes the edge weights, so the CSR structure is built once and every
+    # resample is assembled with a bincount into its data array.
+    def __init__(self, rows, cols, n):
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        self.n = n
+        self.rows = rows
+        self.cols = cols
+        keys = np.concatenate((rows * n + rows, cols * n + cols, rows * n + cols, cols * n + rows))
+        keys, self.slots = np.unique(keys, return_inverse=True)
+        self.indices = keys % n
+        self.indptr = np.searchsorted(keys // n, np.arange(n + 1))
+        self.diagonal = np.flatnonzero(self.indices == keys // n)
+
+    def assemble(self, weights, alpha=0., l0=1., l1=1.):
+        data = np.bincount(self.slots, np.concatenate((weights, weights, -weights, -weights)), len(self.indices))
+        data[self.diagonal] += alpha
+        A = scipy.sparse.csr_matrix((data, self.indices, self.indptr), shape=(self.n, self.n))
+        B = l1 * (np.bincount(self.rows, weights, self.n) - np.bincount(self.cols, weights, self.n)) + alpha * l0
+        return A, B
+
+    def solve(self, weights, alpha=0., l0=1., l1=1., x0=None):
+        # (scores, converged, connected components). A resample can leave out the only comparison
+        # between two groups of teams, so with alpha == 0 every component gets the gauge of
+        # IncrementalSpringRank: its first team is pinned to 0 and the scores are centred on its mean.
+        A, B = self.assemble(weights, alpha, l0, l1)
+        # edges that were not drawn are explicit zeros, which csgraph would count as edges
+        A.eliminate_zeros()
+        count, labels = scipy.sparse.csgraph.connected_components(A, directed=False)
+        diagnostics = {'info': 0}
+        if alpha != 0.:
+            rank = solve_linear_system(A, B, x0=x0, symmetric=True, diagnostics=diagnostics)
+            return rank, diagnostics['info'] == 0, count
+        free = np.ones(self.n, dtype=bool)
+        free[np.unique(labels, return_index=True)[1]] = False
+        rank = np.zeros(self.n)
+        if free.any():
+            rank[free] = solve_linear_system(A[free][:, free], B[free], x0=None if x0 is None else x0[free],
+                                             symmetric=True, diagnostics=diagnostics)
+        rank -= (np.bincount(labels, rank) / np.bincount(labels))[labels]
+        return rank, diagnostics['info'] == 0, count
+
+
+def _bootstrapChunk(rows, cols, n, alpha, l0, l1, seed, count, x0):
+    pattern = LaplacianPattern(rows, cols, n)
+    rng = np.random.default_rng(seed)
+    m = len(rows)
+    samples = np.empty((count, n))
+    converged = np.zeros(count, dtype=bool)
+    components = np.zeros(count, dtype=int)
+    for k in range(count):
+        weights = np.bincount(rng.integers(0, m, m), minlength=m).astype(float)
+        samples[k], converged[k], components[k] = pattern.solve(weights, alpha, l0, l1, x0)
+    return samples, converged, components
+
+
+def bootstrapSpringRank(comparisons, samples=200, alpha=0., l0=1., l1=1., level=0.9, jobs=None, seed=0, context=None):
+    # Resamples the comparisons with replacement and re-solves SpringRank for every resample in a
+    # process pool. With alpha == 0 scores are only defined up to a constant, so every solution is
+    # centred on its mean before the intervals are taken.
+    store = ComparisonStore()
+    store.extend(comparisons)
+    n = len(store.teams)
+    pattern = LaplacianPattern(store.rows, store.cols, n)
+    weights = np.asarray(store.weights, dtype=float)
+    scores, converged, components = pattern.solve(weights, alpha, l0, l1)
+    if not converged:
+        warnings.warn('SpringRank did not converge on the comparisons, the bootstrap scores are not reliable')
+
+    jobs = jobs or os.cpu_count() or 1
+    counts = [samples // jobs + (1 if i < samples % jobs else 0) for i in range(jobs)]
+    seeds = np.random.SeedSequence(seed).spawn(jobs)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+        futures = [pool.submit(_bootstrapChunk, store.rows, store.cols, n, alpha, l0, l1, seeds[i], counts[i], scores)
+                   for i in range(jobs) if counts[i] > 0]
+        chunks = [i.result() for i in futures]
+    resampled, sampleConverged, sampleComponents = (np.concatenate(i) for i in zip(*chunks))
+
+    dropped = int((~sampleConverged).sum())
+    if dropped:
+        warnings.warn('{0} of {1} bootstrap resamples did not converge and were dropped'.format(dropped, samples))
+    resampled = resampled[sampleConverged]
+    split = int((sampleComponents[sampleConverged] > components).sum()) if alpha == 0. else 0
+    if len(resampled) == 0:
+        raise RuntimeError('No bootstrap resample converged')
+    lower, upper = np.percentile(resampled, [50 * (1 - level), 50 * (1 + level)], axis=0)
+    return BootstrapResult(list(store.teams), scores, lower, upper, resampled, dropped, split)
+
+
+def winProbabilities(result, pairs=None):
+    # P(score of i > score of j) over the resamples, for the given index pairs or as a full n x n matrix
+    samples = result.samples
+    if pairs is not None:
+        pairs = np.asarray(pairs).reshape(-1, 2)
+        return (samples[:, pairs[:, 0]] > samples[:, pairs[:, 1]]).mean(0)
+    n = samples.shape[1]
+    out = np.zeros((n, n))
+    for i in range(0, len(samples), 64):
+        chunk = samples[i:i + 64]
+        out += (chunk[:, :, None] > chunk[:, None, :]).sum(0)
+    return out / len(samples)
+
+
+def bootstrapTable(result):
+    # [(team, score, lower, upper, P(team beats the next one))] best first
+    order = np.argsort(-result.scores, kind="stable")
+    beatsNext = winProbabilities(result, np.column_stack((order[:-1], order[1:]))).tolist() + [float("nan")]
+    return [(result.teams[k], result.scores[k], result.lower[k], result.upper[k], beatsNext[i]) for i, k in enumerate(order)]
+
+
+def bootstrapText(result):
+    text = "#)\tteam\tscore [interval]\tP(> next)\n"
+    for i, (team, score, lower, upper, beatsNext) in enumerate(bootstrapTable(result)):
+        text += "{0})\t{1}\t{2:.2f} [{3:.2f}, {4:.2f}]".format(i, team, score, lower, upper)
+        text += "\n" if np.isnan(beatsNext) else "\t{0:.0%}\n".format(beatsNext)
+    if result.dropped:
+        text += "{0} resamples did not converge and were left out\n".format(result.dropped)
+    if result.split:
+        text += "{0} of {1} resamples split the comparison graph, their scores across the split are arbitrary\n".format(
+            result.split, len(result.samples))
+    return text
+
+
+MatchRow = namedtuple("MatchRow", ["team", "match", "fields"])
+PitRow = namedtuple("PitRow", ["team", "fields"])
+ImageLink = namedtuple("ImageLink", ["team", "link"])
+ScoutData = namedtuple("ScoutData", ["teams", "schedule", "customDataConfig", "teamLookupConfig", "imageLinks",
+                                     "matchRows", "pitRows"])
+
+dataDir = os.path.join(os.path.expanduser("~"), ".robottinder")
+cacheDir = os.path.join(dataDir, "cache")
+
+
+def splitTable(text):
+    # same as splitting on <> and /\\ and removeEmptyDataFrom2DArray on the page
+    table = []
+    for row in text.split("<>"):
+        row = [i for i in row.split("/\\") if i]
+        if row:
+            table.append(row)
+    return table
+
+
+def parseRows(text):
+    out = []
+    for row in text.split("<>"):
+        if not row.strip():
+            continue
+        try:
+            out.append(json.loads(row))
+        except ValueError:
+            print("Error: Could not parse row " + row[:80])
+    return out
+
+
+class ScoutDataParser:
+    # Incremental parser for the Scoutmaster5001 payload. Sections separated by UNIQUE1 (and the pit
+    # scout block after UNIQUE2) are turned into records as soon as they are complete, so the
+    # response never has to be held and split as one string.
+    separators = ("UNIQUE1", "UNIQUE2")
+
+    def __init__(self):
+        self.buffer = ""
+        self.block = 0
+        self.sections = 0
+        self.schedule = []
+        self.customDataConfig = []
+        self.teamLookupConfig = []
+        self.imageLinks = []
+        self.matchRows = []
+        self.pitRows = []
+
+    def feed(self, chunk):
+        # only rescan the part of the buffer a separator could still end in
+        start = max(len(self.buffer) - len("UNIQUE1") + 1, 0)
+        self.buffer += chunk
+        while True:
+            found = [(self.buffer.find(i, start), i) for i in self.separators]
+            found = [i for i in found if i[0] != -1]
+            if not found:
+                break
+            pos, separator = min(found)
+            self._section(self.buffer[:pos])
+            self.buffer = self.buffer[pos + len(separator):]
+            start = 0
+            if separator == "UNIQUE2":
+                self.block += 1
+
+    def _section(self, text):
+        if self.block == 0:
+            index = self.sections
+            self.sections += 1
+            if index == 0:
+                self.schedule = splitTable(text)
+            elif index == 1:
+                self.customDataConfig = splitTable(text)
+            elif index == 4:
+                self.teamLookupConfig = splitTable(text)
+            elif index == 6:
+                self.imageLinks = [ImageLink(i[0], i[1]) for i in splitTable(text) if len(i) > 1]
+            elif index >= 7:
+                self.matchRows += [MatchRow(str(i.get("team")), i.get("match"), i) for i in parseRows(text)]
+        elif self.block == 1:
+            self.pitRows += [PitRow(str(i.get("team")), i) for i in parseRows(text)]
+
+    def close(self):
+        self._section(self.buffer)
+        self.buffer = ""
+        teams = sorted({team for row in self.schedule for team in row}, key=int)
+        return ScoutData(teams, self.schedule, self.customDataConfig, self.teamLookupConfig, self.imageLinks,
+                         self.matchRows, self.pitRows)
+
+
+def loadCachedScoutData(link):
+    cachePath = os.path.join(cacheDir, hashlib.sha1(link.encode()).hexdigest() + ".pickle")
+    try:
+        with open(cachePath, "rb") as file:
+            return pickle.load(file)
+    except Exception:
+        return None
+
+
+def saveCachedScoutData(link, cached):
+    cachePath = os.path.join(cacheDir, hashlib.sha1(link.encode()).hexdigest() + ".pickle")
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        with open(cachePath + ".tmp", "wb") as file:
+            pickle.dump(cached, file)
+        os.replace(cachePath + ".tmp", cachePath)
+    except OSError as e:
+        print(e)
+
+
+httpSession = None
+httpSessionLock = threading.Lock()
+
+
+def getHttpSession():
+    # one keep-alive connection pool for all fetches from the web app, so repeated polls skip the
+    # TCP and TLS handshakes
+    global httpSession
+    with httpSessionLock:
+        if httpSession is None:
+            httpSession = requests.Session()
+        return httpSession
+
+
+def fetchScoutData(link):
+    # Streams the payload through ScoutDataParser. The parsed data is cached on disk with the ETag and
+    # content hash of the response, an unchanged payload (304 or same hash) reuses the cached records
+    # and the cache is used as is when the web app can't be reached. Without an ETag (Apps Script
+    # doesn't send one) the payload is still downloaded, but with a cached copy the chunks are only
+    # parsed once the hash shows they changed.
+    cached = loadCachedScoutData(link)
+    headers = {}
+    if cached is not None and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
+    try:
+        with getHttpSession().get(link, headers=headers, stream=True, timeout=30) as r:
+            if r.status_code == 304 and cached is not None:
+                return cached["data"]
+            r.raise_for_status()
+            if r.encoding is None:
+                r.encoding = "utf-8"
+            parser = ScoutDataParser()
+            digest = hashlib.sha256()
+            chunks = [] if cached is not None else None
+            for chunk in r.iter_content(chunk_size=65536, decode_unicode=True):
+                digest.update(chunk.encode())
+                if chunks is None:
+                    parser.feed(chunk)
+                else:
+                    chunks.append(chunk)
+            etag = r.headers.get("ETag")
+    except requests.RequestException as e:
+        if cached is None:
+            raise
+        print("Error: Could not reach the web app, using cached data. " + str(e))
+        return cached["data"]
+
+    contentHash = digest.hexdigest()
+    if cached is not None and cached["hash"] == contentHash:
+        return cached["data"]
+    for chunk in chunks or ():
+        parser.feed(chunk)
+    data = parser.close()
+    saveCachedScoutData(link, {"etag": etag, "hash": contentHash, "data": data})
+    return data
+
+
+pitFields = ["dtType", "wheelsNum", "motorType", "motorNum", "comments"]
+
+
+def parseInt(value):
+    # javascript parseInt, NaN when the value does not start with an integer
+    match = re.match(r"\s*([+-]?\d+)", str(value))
+    return int(match.group(1)) if match else float("nan")
+
+
+def jsString(fields, key):
+    # fields[key] the way the page would concatenate it into a string
+    if key not in fields:
+        return "undefined"
+    value = fields[key]
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def datapointStats(rows, configRows):
+    # average and per match values of one team lookup datapoint over the match rows of a team
+    values = []
+    matches = []
+    totalSum = 0
+    isText = False
+    for row in rows:
+        total = 0
+        text = ""
+        for config in configRows:
+            for field in config[2:]:
+                if config[1] == "Numeric":
+                    total += parseInt(row.fields.get(field))
+                    isText = False
+                else:
+                    text += jsString(row.fields, field)
+                    isText = True
+        totalSum += total
+        values.append(text if isText else total)
+        matches.append(jsString(row.fields, "match"))
+    average = totalSum / len(rows) if rows else float("nan")
+    return average, [values, matches]
+
+
+def teamStatsBuilder(data):
+    # (page wide fields, function team -> stats of that team, every team with data)
+    lookupConfig = data.teamLookupConfig
+    rowsNum = parseInt(lookupConfig[0][0]) if lookupConfig else 1
+    averages = [i[0] for i in lookupConfig[1:] if len(i) > 1 and i[1] == "Average"]
+    lists = [i[0] for i in lookupConfig[1:] if len(i) > 1 and i[1] == "List All"]
+
+    configRows = {}
+    for i in data.customDataConfig:
+        configRows.setdefault(i[0], []).append(i)
+    matchRows = {}
+    for i in data.matchRows:
+        matchRows.setdefault(i.team, []).append(i)
+    pitRows = {}
+    for i in data.pitRows:
+        pitRows.setdefault(i.team, i)
+    images = {}
+    for i in data.imageLinks:
+        images.setdefault(i.team, i.link)
+
+    def teamStats(team):
+        rows = matchRows.get(team, [])
+        stats = {"averages": [], "lists": [], "image": images.get(team, "")}
+        for name in averages:
+            stats["averages"].append(datapointStats(rows, configRows.get(name, []))[0])
+        for name in lists:
+            stats["lists"].append(datapointStats(rows, configRows.get(name, []))[1])
+        if team in pitRows:
+            stats["pit"] = {i: jsString(pitRows[team].fields, i) for i in pitFields}
+        else:
+            stats["pit"] = {i: "error" for i in pitFields}
+        return stats
+
+    teamsIndex = set(data.teams) | set(matchRows) | set(pitRows) | set(images)
+    return {"rowsNum": rowsNum, "averages": averages, "lists": lists}, teamStats, teamsIndex
+
+
+def buildTeamStats(data):
+    # Per team aggregate index the page renders from, built once per data load instead of the page
+    # parsing every match row for every table cell
+    stats, teamStats, teamsIndex = teamStatsBuilder(data)
+    stats["teams"] = {team: teamStats(team) for team in teamsIndex}
+    stats["empty"] = teamStats(None)
+    return stats
+
+
+def updatedTeamStats(data, teams):
+    # {team: stats} for just the given teams, for merging into an index built by buildTeamStats
+    stats, teamStats, teamsIndex = teamStatsBuilder(data)
+    return {team: teamStats(team) for team in teams if team in teamsIndex}
+
+
+def firstByTeam(rows):
+    first = {}
+    for row in rows:
+        first.setdefault(row.team, row)
+    return first
+
+
+def changedTeams(previous, data):
+    # Teams whose stats can differ between two loads of the same web app, or None when the data point
+    # configuration changed and every team has to be rebuilt. During an event new match rows are only
+    # appended, so the common case is a prefix check and the teams of the new rows.
+    if (previous.customDataConfig, previous.teamLookupConfig) != (data.customDataConfig, data.teamLookupConfig):
+        return None
+    known = len(previous.matchRows)
+    if data.matchRows[:known] == previous.matchRows:
+        changed = {row.team for row in data.matchRows[known:]}
+    else:
+        before = {}
+        for row in previous.matchRows:
+            before.setdefault(row.team, []).append(row)
+        after = {}
+        for row in data.matchRows:
+            after.setdefault(row.team, []).append(row)
+        changed = {team for team in set(before) | set(after) if before.get(team) != after.get(team)}
+    for old, new in ((previous.pitRows, data.pitRows), (previous.imageLinks, data.imageLinks)):
+        if old != new:
+            # only the first pit row and image of a team are shown
+            old = firstByTeam(old)
+            new = firstByTeam(new)
+            changed |= {team for team in set(old) | set(new) if old.get(team) != new.get(team)}
+    changed |= set(data.teams) - set(previous.teams)
+    return changed
+
+
+class ComparisonJournal:
+    # Write-ahead journal for the comparisons of the running session. Each comparison is appended and
+    # fsynced as soon as it is made and every compactEvery comparisons everything is written to a
+    # numpy snapshot of team pairs and the journal starts over. Journal lines carry the index of the
+    # comparison, so a crash between writing the snapshot and truncating the journal can't duplicate
+    # entries and a torn last line is cut off when the journal is loaded.
+    compactEvery = 500
+
+    def __init__(self, path):
+        self.path = path
+        self.snapshotPath = path + ".npy"
+        self.sessionPath = path + ".session"
+        self.sessionId = None  # kept when the session is restored, see MergeClient
+        self.count = 0
+        self.sinceCompact = 0
+        self.file = None
+
+    def load(self):
+        comparisons = []
+        if os.path.exists(self.sessionPath):
+            with open(self.sessionPath, 'r') as file:
+                self.sessionId = file.read().strip() or None
+        if os.path.exists(self.snapshotPath):
+            comparisons = np.load(self.snapshotPath).tolist()
+        if os.path.exists(self.path):
+            with open(self.path, 'rb+') as file:
+                good = 0  # end of the last complete line
+                for line in file:
+                    try:
+                        index, comparison = line.decode().split()
+                        comparison = list(map(int, comparison.split(">")))
+                        index = int(index)
+                    except ValueError:
+                        break
+                    if not line.endswith(b"\n") or index > len(comparisons) or len(comparison) != 2:
+                        break
+                    if index == len(comparisons):
+                        comparisons.append(comparison)
+                    good += len(line)
+                # cut off a torn last line, otherwise the next appended line would be glued onto it
+                if good < os.fstat(file.fileno()).st_size:
+                    file.truncate(good)
+                    file.flush()
+                    os.fsync(file.fileno())
+        self.count = len(comparisons)
+        self.sinceCompact = 0
+        return comparisons
+
+    def sync(self, comparisons):
+        if len(comparisons) <= self.count:
+            return
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.file = open(self.path, 'a')
+        for i in comparisons[self.count:]:
+            self.file.write("{0} {1}>{2}\n".format(self.count, i[0], i[1]))
+            self.count += 1
+            self.sinceCompact += 1
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        if self.sinceCompact >= self.compactEvery:
+            self.compact(comparisons)
+
+    def newSession(self):
+        self.sessionId = uuid.uuid4().hex
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.sessionPath + ".tmp", 'w') as file:
+            file.write(self.sessionId)
+        os.replace(self.sessionPath + ".tmp", self.sessionPath)
+        return self.sessionId
+
+    def compact(self, comparisons):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.snapshotPath + ".tmp", 'wb') as file:
+            np.save(file, np.asarray(comparisons, dtype=np.int64).reshape(-1, 2))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(self.snapshotPath + ".tmp", self.snapshotPath)
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.path, 'w')
+        self.count = len(comparisons)
+        self.sinceCompact = 0
+
+
+columnsMagic = b"RTCOLS1\n"
+
+
+def saveColumns(path, tables, meta=None):
+    # Writes {table: {column: 1-d array}} to one file: a JSON header followed by the raw column data,
+    # every column aligned to 64 bytes so loadColumns can memory-map it without parsing anything
+    header = {"meta": meta or {}, "tables": {}}
+    arrays = []
+    offset = 0
+    for table, columns in tables.items():
+        header["tables"][table] = {}
+        for name, values in columns.items():
+            values = np.ascontiguousarray(values)
+            header["tables"][table][name] = {"dtype": values.dtype.str, "length": len(values), "offset": offset}
+            arrays.append(values)
+            offset += -(-values.nbytes // 64) * 64
+    headerBytes = json.dumps(header).encode()
+    start = -(-(len(columnsMagic) + 8 + len(headerBytes)) // 64) * 64
+    with open(path + ".tmp", 'wb') as file:
+        file.write(columnsMagic)
+        file.write(struct.pack("<Q", len(headerBytes)))
+        file.write(headerBytes)
+        file.write(b"\0" * (start - file.tell()))
+        for values in arrays:
+            file.write(values.tobytes())
+            file.write(b"\0" * (-values.nbytes % 64))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def isColumnsFile(path):
+    with open(path, 'rb') as file:
+        return file.read(len(columnsMagic)) == columnsMagic
+
+
+def loadColumns(path, mmap=True):
+    # ({table: {column: array}}, meta), the arrays are read-only views of the file when mmap is set
+    with open(path, 'rb') as file:
+        if file.read(len(columnsMagic)) != columnsMagic:
+            raise ValueError(path + " is not a RobotTinder columns file")
+        length = struct.unpack("<Q", file.read(8))[0]
+        header = json.loads(file.read(length).decode())
+    start = -(-(len(columnsMagic) + 8 + length) // 64) * 64
+    tables = {}
+    for table, columns in header["tables"].items():
+        tables[table] = {}
+        for name, column in columns.items():
+            dtype = np.dtype(column["dtype"])
+            if column["length"] == 0:
+                values = np.zeros(0, dtype)
+            elif mmap:
+                values = np.memmap(path, dtype, 'r', start + column["offset"], (column["length"],))
+            else:
+                values = np.fromfile(path, dtype, column["length"], offset=start + column["offset"])
+            tables[table][name] = values
+    return tables, header["meta"]
+
+
+def matchColumns(matchRows):
+    # one column per field of the match rows, numeric fields as float64 with NaN where a row lacks
+    # them, everything else as fixed width strings
+    names = list(dict.fromkeys(key for row in matchRows for key in row.fields))
+    columns = {}
+    for name in names:
+        values = [row.fields.get(name) for row in matchRows]
+        if all(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)) for value in values):
+            columns[name] = np.array([np.nan if value is None else value for value in values], dtype=float)
+        else:
+            columns[name] = np.array(["" if value is None else str(value) for value in values], dtype=str)
+    return columns
+
+
+def exportSession(path, comparisons, times=None, scout="", rankings=(), matchRows=()):
+    # Comparisons with click time and scout, ranking snapshots [(comparisons made, teams, scores)] in
+    # long format and the parsed match rows, in one columns file for notebooks and the headless ranker
+    comparisons = np.asarray(comparisons, dtype=np.int64).reshape(-1, 2)
+    n = len(comparisons)
+    rankings = list(rankings)
+    sizes = [len(teams) for count, teams, scores in rankings]
+    tables = {
+        "comparisons": {
+            "better": comparisons[:, 0],
+            "worse": comparisons[:, 1],
+            "time": np.full(n, np.nan) if times is None else np.asarray(times, dtype=float),
+            "scout": np.repeat(np.array([scout]), n),
+        },
+        "rankings": {
+            "snapshot": np.repeat(np.arange(len(rankings), dtype=np.int64), sizes),
+            "comparisons": np.repeat(np.array([count for count, teams, scores in rankings], dtype=np.int64), sizes),
+            "team": np.array([team for count, teams, scores in rankings for team in teams], dtype=np.int64),
+            "score": np.array([score for count, teams, scores in rankings for score in scores], dtype=float),
+        },
+        "matches": matchColumns(list(matchRows)),
+    }
+    saveColumns(path, tables, {"version": 1, "exported": time.time()})
+
+
+class MergeClient:
+    # Pushes the comparisons of this scout to a merge_server.py instance. sync sends everything that
+    # has not been acknowledged yet as one batch, the server skips entries it already has in this
+    # session. A restarted app starts a new session unless it restores the journal of the old one.
+    def __init__(self, url, scout, sessionId=None):
+        self.url = url.rstrip("/")
+        self.scout = scout
+        self.sessionId = sessionId or uuid.uuid4().hex
+        self.sent = 0
+        self.session = requests.Session()
+
+    def sync(self, comparisons):
+        new = comparisons[self.sent:]
+        if len(new) == 0:
+            return self.sent
+        r = self.session.post(self.url + "/comparisons", timeout=10,
+                              json={"scout": self.scout, "session": self.sessionId, "start": self.sent,
+                                    "comparisons": new})
+        if r.status_code not in (200, 409):
+            r.raise_for_status()
+        # on 409 the server has fewer comparisons than we sent (e.g. it was restarted), resend from there
+        self.sent = r.json()["count"]
+        return self.sent
+
+
+scoutData = None
+scoutLink = None  # link scoutData was loaded from, synced again incrementally
+pollInterval = float(os.environ.get("ROBOTTINDER_POLL", 0))  # seconds between syncs of scoutLink, 0 = off
+pollTimer = None
+teamStats = None
 
 team1STR = ""
 team2STR = ""
 
 comparisonsData = []
-ranks = []
+comparisonTimes = []  # click time of every comparison, NaN for loaded ones
+rankHistory = []  # (comparisons made, teams, scores) of every solve
+scoutName = os.environ.get("ROBOTTINDER_SCOUT", platform.node())
 trueRanks = []
+rankText = ""
+# relative score difference below which teams are shown as tied, well above the bicgstab tolerance
+tieTolerance = 1e-4
 teams = []
-
-
-def getData(link):
-    global pitScoutData, dataIn, matchData, teams
-    r = requests.get(link).text
-    config1 = r.split("UNIQUE2")
-    dataIn = config1[0].split("UNIQUE1")
-    # Get pit scout data
-    pitScoutData = "<>".join(config1[1].split("UNIQUE1"))
-    matchData = "<>".join(dataIn[7:])
-
-    ms = []
-    ref = dataIn[0].split("<>")
-    for i in ref:
-        ms.append([i for i in i.split("/\\") if i])
-    ms = [i for i in ms if i]
-    teams = list({x for i in ms for x in i})
-    teams.sort(key=int)
+# teams and scores of the last finished solve, read by the GUI while the next solve runs
+rankSnapshot = ([], [])
+fetchWorker = None
+rankWorker = None
+speculationWorker = None
+speculation = None  # (number of comparisons, {(better, worse): (ranking, next pair)}) for the pair on screen
+journal = ComparisonJournal(os.path.join(dataDir, "session.journal"))
+mergeClient = None
+mergeWorker = None
+bootstrapWorker = None
+bootstrapSamples = 200
+timingLabel = None
+web = None
+bridge = None
+startupBenchmark = bool(os.environ.get("ROBOTTINDER_STARTUP_BENCH"))
+rankEngine = None
+rankCache = RankCache(directory=os.environ.get("ROBOTTINDER_RANK_CACHE") or None)
+comparisonLedger = ComparisonLedger()
+pairSelector = ClosestScorePairSelector(comparisonLedger)
+
+
+def loadData(link, previous=None):
+    # (link, data, full stats index or None, {team: stats} of the changed teams or None). Given the data
+    # of the last load of the same link only the stats of teams with new or changed rows are rebuilt.
+    with timings.span("fetch"):
+        data = fetchScoutData(link)
+    if previous is not None:
+        with timings.span("updateTeamStats"):
+            changed = changedTeams(previous, data)
+            if changed is not None:
+                return link, data, None, updatedTeamStats(data, changed)
+    with timings.span("buildTeamStats"):
+        return link, data, buildTeamStats(data), None
 
 
 html = r'''<!doctype html>
@@ -191,34 +1778,20 @@ html = r'''<!doctype html>
     <div class="column" id="team1"></div>
     <div class="column" id="team2"></div>
   </div>
+  <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
   <script>
-  var stringSeparator1 = "/\\"
-  var stringSeparator2 = "<>"
-  var customConfigDataSTR = ""
-  var getMatchDataSTR = ""
-  var getTeamLookupConfigSTR = ""
-  var pitDataSTR = ""
-  var imgLinkSTR = ""
+  var teamStats = {"rowsNum": 1, "averages": [], "lists": [], "teams": {}, "empty": {}}
   var imgIDCounter = 0
-
-  function setData(AcustomConfigDataSTR, AgetMatchDataSTR, AgetTeamLookupConfigSTR, AimgLinkSTR, ApitDataSTR) {
-    customConfigDataSTR = AcustomConfigDataSTR
-    getMatchDataSTR = AgetMatchDataSTR
-    getTeamLookupConfigSTR = AgetTeamLookupConfigSTR
-    imgLinkSTR = AimgLinkSTR
-    pitDataSTR = ApitDataSTR
+  // rendered team panels, built once per team and moved in and out of the columns
+  var panels = {}
+  var shownPair = null
+  var bridge = null
+
+  function setTeamStats(stats) {
+    teamStats = stats
+    panels = {}
   }
 
-  function getPitData() {
-    return pitDataSTR.split(stringSeparator2)
-  }
-
-  function getImgLinks() {
-    var rawData = imgLinkSTR.split(stringSeparator2)
-    var imgLinks = []
-    for(var i = 0; i < rawData.length; i++) {  imgLinks.push(rawData[i].split(stringSeparator1)) }
-    return removeEmptyDataFrom2DArray(imgLinks)
-  }
   function growImg(imgID) {
     img = document.getElementById(imgID); 
     if(img.style.width == "200px" || img.style.width == "") {
@@ -231,68 +1804,71 @@ html = r'''<!doctype html>
     img.style.height = "auto"; 
     img.style.transition = "width 0.5s ease"; 
   } 
-  function createTables(team1, team2) {
-    var html1 = getTeamLookupHTML(team1)
-    var html2 = getTeamLookupHTML(team2)
-    document.getElementById("team1").innerHTML = '<h2>' + team1 + '</h2><br><br>' + html1
-    document.getElementById("team2").innerHTML = '<h2>' + team2 + '</h2><br><br>' + html2
+  function getPanel(team) {
+    if(!(team in panels)) {
+      // the image starts downloading as soon as the img element exists, even while the panel is detached
+      var panel = document.createElement("div")
+      panel.innerHTML = '<h2>' + team + '</h2><br><br>' + getTeamLookupHTML(team)
+      panels[team] = panel
+    }
+    return panels[team]
   }
-  function getImgLinkHTML(data, team) {
-    var apost = "'"
-    for(var i = 0; i < data.length; i++) {
-      if(data[i][0] == team) {
-        var imgId = team + "TeamImgID" + imgIDCounter
-        imgIDCounter += 1
-        return '<img src="' + data[i][1] + '" id="' + imgId + '" class="teamImg" onclick="growImg(' + apost + imgId + apost + ')">'
-      }
+  function updateTeams(updated) {
+    for(var team in updated) {
+      teamStats.teams[team] = updated[team]
+      delete panels[team]
+    }
+    if(shownPair != null && (shownPair[0] in updated || shownPair[1] in updated)) {
+      showPair(shownPair[0], shownPair[1])
     }
-    return ""
   }
-
-
-  function getCustomDataConfig() {
-    var rawData = customConfigDataSTR.split(stringSeparator2)
-    var matchSchedule = []
-    for(var i = 0; i < rawData.length; i++) {  matchSchedule.push(rawData[i].split(stringSeparator1)) }
-    return removeEmptyDataFrom2DArray(matchSchedule)
+  function showPair(team1, team2) {
+    var start = performance.now()
+    shownPair = [team1, team2]
+    var column1 = document.getElementById("team1")
+    var column2 = document.getElementById("team2")
+    column1.textContent = ""
+    column1.appendChild(getPanel(team1))
+    column2.textContent = ""
+    column2.appendChild(getPanel(team2))
+    return performance.now() - start
   }
-  function getMatchData() {
-    return getMatchDataSTR.split(stringSeparator2)
+  function prefetchTeams(teams) {
+    for(var i = 0; i < teams.length; i++) { getPanel(teams[i]) }
   }
-  function getTeamLookupConfig() {
-    var rawData = getTeamLookupConfigSTR.split(stringSeparator2)
-    var teamLookupConfig = []
-    for(var i = 0; i < rawData.length; i++) {  teamLookupConfig.push(rawData[i].split(stringSeparator1)) }
-    return removeEmptyDataFrom2DArray(teamLookupConfig)
+  new QWebChannel(qt.webChannelTransport, function(channel) {
+    bridge = channel.objects.bridge
+    bridge.statsChanged.connect(function(stats) { setTeamStats(JSON.parse(stats)) })
+    bridge.teamsChanged.connect(function(updated) { updateTeams(JSON.parse(updated)) })
+    bridge.pairChanged.connect(function(team1, team2) { bridge.rendered(showPair(team1, team2)) })
+    bridge.prefetchTeams.connect(prefetchTeams)
+    bridge.ready()
+  })
+  function getImgLinkHTML(link, team) {
+    if(link == "") { return "" }
+    var apost = "'"
+    var imgId = team + "TeamImgID" + imgIDCounter
+    imgIDCounter += 1
+    return '<img src="' + link + '" id="' + imgId + '" class="teamImg" onclick="growImg(' + apost + imgId + apost + ')">'
   }
 
-  function getPitScoutHTMLTable(team, pitData) {
+  function getPitScoutHTMLTable(pit) {
     var html = '<table class="table"><tr class="tableAA"><th class="tableAA">Drive Train</th><th class="tableAA">Wheels #:</th>'
     html += '<th tableAA="table">Motor Type:</th><th tableAA="tableAA">Motor #:</th><th class="tableAA">Comments:</th></tr><tr class="table">'
-    html += '<td class="table">' + getPitDatapoint(pitData, team, "dtType") + '</td>'
-    html += '<td class="table">' + getPitDatapoint(pitData, team, "wheelsNum") + '</td>'
-    html += '<td class="table">' + getPitDatapoint(pitData, team, "motorType") + '</td>'
-    html += '<td class="table">' + getPitDatapoint(pitData, team, "motorNum") + '</td>'
-    html += '<td class="table">' + getPitDatapoint(pitData, team, "comments") + '</td></tr></table>'
+    html += '<td class="table">' + pit["dtType"] + '</td>'
+    html += '<td class="table">' + pit["wheelsNum"] + '</td>'
+    html += '<td class="table">' + pit["motorType"] + '</td>'
+    html += '<td class="table">' + pit["motorNum"] + '</td>'
+    html += '<td class="table">' + pit["comments"] + '</td></tr></table>'
     return html
   }
 
   function getTeamLookupHTML(team) {
-    var configData = getCustomDataConfig()
-    var scoutingData = getMatchData()
-    var lookupConfigData = getTeamLookupConfig()
-
-    var rowsNum = parseInt(lookupConfigData[0][0])
-    var listDataPoints = []
-    var compiledDataPoints = []
-    for(var i = 1; i < lookupConfigData.length; i++) {
-      if(lookupConfigData[i][1] == "Average") {
-        compiledDataPoints.push(lookupConfigData[i][0])
-      } else if(lookupConfigData[i][1] == "List All") {
-        listDataPoints.push(lookupConfigData[i][0])
-      }
-    }
-
+    // everything is precomputed per team on the python side, see buildTeamStats
+    var stats = teamStats.teams[team] || teamStats.empty
+    var rowsNum = teamStats.rowsNum
+    var compiledDataPoints = teamStats.averages
+    var listDataPoints = teamStats.lists
 
     var htmlTable = '<table class="teamLookupTable">'
     for(var i = 0; i < compiledDataPoints.length / rowsNum; i++) {
@@ -303,7 +1879,7 @@ html = r'''<!doctype html>
       htmlTable += '</tr><tr class="teamLookupTable">'
       for(var j = 0; j < rowsNum; j++) {
         if(compiledDataPoints[i*rowsNum + j] != undefined) { 
-          htmlTable += '<td class="table">' + getDatapoint(team, compiledDataPoints[i*rowsNum + j], true) + '</td>' 
+          htmlTable += '<td class="table">' + stats.averages[i*rowsNum + j] + '</td>' 
         }
       }
       htmlTable += '</tr>'
@@ -311,7 +1887,7 @@ html = r'''<!doctype html>
     for(var i = 0; i < listDataPoints.length; i++) {
       htmlTable += '<tr class="teamLookupTable">'
       htmlTable += '<th class="tableAA">' + listDataPoints[i]+ '</th>'
-      var data = getDatapoint(team, listDataPoints[i], false)
+      var data = stats.lists[i]
 
       for(var j = 0; j < data[0].length; j++) {
         if((j + 1) % rowsNum == 0 && j != 0) { htmlTable += '</tr><tr class="teamLookupTable">' }
@@ -321,157 +1897,208 @@ html = r'''<!doctype html>
     }
 
     htmlTable += '</table>'
-     return getImgLinkHTML(getImgLinks(), team) + '<br><br>' + getPitScoutHTMLTable(team, getPitData()) + htmlTable
-     // return getImgLinkHTML(getImgLinks(), team) + '<br><br>' + getPitScoutHTMLTable(team, getPitData()) + htmlTable
-  }
-
-  function getPitDatapoint(data, team, datapoint) {
-    for(var i = 0; i < data.length; i++) {
-      var json = JSON.parse(data[i])
-      if(json["team"] == team) {
-        return json[datapoint]
-      }
-    }
-    return 'error'
-  }
-
-  function getDatapoint(team, datapoint, isAv) {
-    var scoutingData = getMatchData()
-    var configData = getCustomDataConfig()
-    var count = 0;
-    var sum = 0;
-    var text = ""
-    var isText = false
-    var outList = []
-    var matchesList = []
-    for(var j = 0; j < scoutingData.length; j++) {
-      var json = JSON.parse(scoutingData[j])
-      var matchNum = json.match
-      if(json.team == team) {
-        for(var k = 0; k < configData.length; k++) {
-          if(configData[k][0] == datapoint) {
-            for(var l = 2; l < configData[k].length; l++) {
-              if(configData[k][1] == "Numeric") {
-                sum += parseInt(json[configData[k][l]])
-                isText = false
-              } else {
-                text += json[configData[k][l]]
-                isText = true
-              }
-            }
-          }    
-        }
-        if(isAv) {
-          count++;
-        } else {
-          if(!isText) {
-            outList.push(sum)
-            matchesList.push(matchNum)
-            sum = 0
-          } else {
-            outList.push(text)
-            matchesList.push(matchNum)
-            text = ""
-          }
-
-        }
-      }
-    }
-    if(isAv) {
-      return sum / count
-    }
-    return [outList, matchesList]
-  }
-    function removeEmptyDataFrom2DArray(array) {
-    var array = array.filter(function (el) { return el != null; });
-    for(var i = 0; i < array.length; i++) {
-      array[i] = array[i].filter(function (el) { return el != null; });
-      array[i] = array[i].filter(function (el) { return el != ""; });
-    }
-    array = array.filter(function (el) { return el != []; });
-    return array
+     return getImgLinkHTML(stats.image, team) + '<br><br>' + getPitScoutHTMLTable(stats.pit) + htmlTable
   }
   </script>
   </body>
 '''
 
-app = QApplication(sys.argv)
-win = QWidget()
-layout = QGridLayout()
-rankDisplayScroll = QScrollArea()
-rankDisplayScroll.setFixedWidth(int(app.primaryScreen().size().width() / 9))
-rankDisplayLayout = QGridLayout()
-
-top = QWidget()
-topLayout = QGridLayout()
-left = QWidget()
-leftLayout = QGridLayout()
-row1 = QWidget()
-row1Layout = QGridLayout()
-row2 = QWidget()
-row2Layout = QGridLayout()
-
-web = QWebEngineView()
-linkEntry = QLineEdit()
-# linkEntry.setText("https://script.google.com/macros/s/AKfycbzbVJ03rdYPL7VORjsFZgu6AU4UnLAGrPAgFeCzBJoAOqnA3C4rf1JX/exec")
-submit = QPushButton("Enter Link", win)
-rankDisplayWidget = QTextEdit()
-saveFileButton = QPushButton("Save")
-rankDisplayScroll.setWidgetResizable(True)
-rankDisplayLayout.addWidget(rankDisplayWidget, 1, 0)
-rankDisplayLayout.addWidget(saveFileButton, 0, 0)
-rankDisplayScroll.setLayout(rankDisplayLayout)
-
-row1Layout.addWidget(linkEntry, 0, 0)
-row1Layout.addWidget(submit, 0, 1)
-row1Layout.setSpacing(0)
-row1Layout.setAlignment(Qt.AlignTop)
-row1.setLayout(row1Layout)
-
-team1 = QPushButton("Team 1", win)
-team2 = QPushButton("Team 2", win)
-row2Layout.addWidget(team1, 0, 0)
-row2Layout.addWidget(team2, 0, 1)
-row2Layout.setAlignment(Qt.AlignTop)
-row2.setLayout(row2Layout)
-
-topLayout.addWidget(row1, 0, 0)
-topLayout.addWidget(row2, 1, 0)
-topLayout.setAlignment(Qt.AlignTop)
-top.setLayout(topLayout)
+
+def pageJson(value):
+    # JSON for the page. JSON.parse rejects the bare NaN json.dumps writes for the average of a team
+    # without match rows, the page only concatenates the values into html, so NaN is sent as "NaN".
+    def clean(value):
+        if isinstance(value, float) and not math.isfinite(value):
+            return "NaN" if math.isnan(value) else ("Infinity" if value > 0 else "-Infinity")
+        if isinstance(value, dict):
+            return {k: clean(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [clean(i) for i in value]
+        return value
+
+    return json.dumps(clean(value), allow_nan=False)
+
+
+def importQt():
+    # Qt is only imported for the GUI, so the rank command, merge_server.py and simulate_scouting.py run
+    # on machines without PyQt5. The Qt classes are defined here as module globals.
+    global QObject, QRunnable, QThreadPool, QTimer, Qt, pyqtSignal, pyqtSlot, QApplication, QFileDialog, \
+        QGridLayout, QLabel, QLineEdit, QMessageBox, QPushButton, QScrollArea, QTextEdit, QWidget, PageBridge, \
+        WorkerSignals, Worker
+    from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, Qt, pyqtSignal, pyqtSlot
+    from PyQt5.QtWidgets import (QApplication, QFileDialog, QGridLayout, QLabel, QLineEdit, QMessageBox, QPushButton,
+                                 QScrollArea, QTextEdit, QWidget)
+
+    class PageBridge(QObject):
+        # Python side of the QWebChannel to the page. The team stats cross once per data load as JSON,
+        # after that only team numbers do, the page renders every team panel once and swaps them in.
+        statsChanged = pyqtSignal(str)
+        teamsChanged = pyqtSignal(str)
+        pairChanged = pyqtSignal(str, str)
+        prefetchTeams = pyqtSignal(list)
+
+        def __init__(self):
+            super().__init__()
+            self.stats = None
+            self.pair = None
+
+        def setStats(self, stats):
+            self.stats = stats
+            self.statsChanged.emit(pageJson(stats))
+
+        def updateTeams(self, updated):
+            # updated is already merged into self.stats["teams"] by the caller
+            self.teamsChanged.emit(pageJson(updated))
+
+        def showPair(self, team1, team2):
+            self.pair = (team1, team2)
+            self.pairChanged.emit(team1, team2)
+
+        @pyqtSlot()
+        def ready(self):
+            # the page only connects once it has loaded, replay what was sent before that
+            if self.stats is not None:
+                self.statsChanged.emit(pageJson(self.stats))
+            if self.pair is not None:
+                self.pairChanged.emit(*self.pair)
+
+        @pyqtSlot(float)
+        def rendered(self, milliseconds):
+            timings.record("showPair", milliseconds / 1000)
+            updateTimings()
+
+    class WorkerSignals(QObject):
+        finished = pyqtSignal(object)
+        failed = pyqtSignal(str)
+
+    class Worker(QRunnable):
+        # Runs fn(*args) on a QThreadPool and reports back through signals, which are delivered on the
+        # GUI thread. A cancelled worker that has not started yet does nothing, one that is already
+        # running has its result dropped.
+        def __init__(self, fn, *args, **kwargs):
+            super().__init__()
+            self.fn = fn
+            self.args = args
+            self.kwargs = kwargs
+            self.signals = WorkerSignals()
+            self.cancelled = False
+
+        def cancel(self):
+            self.cancelled = True
+
+        def run(self):
+            if self.cancelled:
+                return
+            try:
+                result = self.fn(*self.args, **self.kwargs)
+            except Exception as e:
+                if not self.cancelled:
+                    self.signals.failed.emit(str(e))
+                return
+            if not self.cancelled:
+                self.signals.finished.emit(result)
 
 
 def submitLink():
-    global linkEntry
-    if linkEntry.text() == "":
+    # a new link loads everything, Enter Link with an empty entry syncs the last link again
+    if linkEntry.text() != "":
+        syncLink(linkEntry.text() + "?data={}")
+        linkEntry.clear()
+    else:
+        pollScoutData()
+
+
+def syncLink(link):
+    global fetchWorker
+    if fetchWorker is not None:
+        fetchWorker.cancel()
+    worker = Worker(loadData, link, scoutData if link == scoutLink else None)
+    worker.signals.finished.connect(lambda result: fetchDone(worker, result))
+    worker.signals.failed.connect(lambda error: fetchDone(worker, error))
+    fetchWorker = worker
+    fetchPool.start(worker)
+
+
+def pollScoutData():
+    # never cancels the fetch in flight, whether it is a sync slower than the poll interval or the load
+    # of a new link, which would otherwise be replaced by a sync of the old one
+    if scoutLink is not None and fetchWorker is None:
+        syncLink(scoutLink)
+
+
+def fetchDone(worker, result):
+    global fetchWorker
+    if worker is not fetchWorker:
+        # replaced by a newer fetch
         return
-    getData(linkEntry.text() + "?data={}")
-    linkEntry.clear()
-    web.page().runJavaScript(
-        "setData(String.raw`{0}`, String.raw`{1}`, String.raw`{2}`, String.raw`{3}`, String.raw`{4}`)".format(dataIn[1], matchData, dataIn[4], dataIn[6], pitScoutData))
-    createPage()
+    fetchWorker = None
+    if isinstance(result, str):
+        print("Error: Could not load scout data. " + result)
+    else:
+        dataLoaded(result)
+
+
+def dataLoaded(result):
+    global scoutLink, scoutData, teamStats, teams
+    scoutLink, scoutData, stats, updated = result
+    teams = scoutData.teams
+    if stats is not None:
+        teamStats = stats
+        bridge.setStats(teamStats)
+        createPage()
+        return
+    # incremental sync, only the changed teams go to the page and the pair on screen stays
+    if updated:
+        teamStats["teams"].update(updated)
+        bridge.updateTeams(updated)
+    if team1STR == "":
+        createPage()
 
 
 def createPage():
-    global web, team1, team2
-    getNextTeams()
-    web.page().runJavaScript("createTables('{0}', '{1}')".format(team1STR, team2STR))
+    with timings.span("getNextTeams"):
+        getNextTeams()
+    showPair()
+
+
+def showPair():
+    with timings.span("sendPair"):
+        # the page reports its own render time back through PageBridge.rendered
+        bridge.showPair(team1STR, team2STR)
+        bridge.prefetchTeams.emit(likelyTeams())
     team1.setText(team1STR)
     team2.setText(team2STR)
+    startSpeculation()
 
 
-def getTeams(dataInIn):
-    out = []
-    for i in dataInIn:
-        for j in i:
-            if not int(j) in out:
-                out.append(int(j))
-    out.sort()
-    return out
+def likelyTeams():
+    # teams that could be shown next, so their panels and images are ready before the click: the least
+    # compared teams and the score neighbours of the current pair
+    likely = [str(team) for team in comparisonLedger.leastCompared(4)]
+    localTeams, scores = rankSnapshot
+    if len(localTeams) > 2:
+        order = np.argsort(scores)
+        position = {str(localTeams[k]): i for i, k in enumerate(order)}
+        for team in (team1STR, team2STR):
+            if team in position:
+                i = position[team]
+                likely += [str(localTeams[k]) for k in order[max(i - 1, 0):i + 2]]
+    return list(dict.fromkeys(likely))
 
 
-def Diff(li1, li2):
-    return list(list(set(li1) - set(li2)) + list(set(li2) - set(li1)))
+def updateTimings():
+    if timingLabel is not None:
+        timingLabel.setText(timings.summary())
+
+
+def exportTimings():
+    try:
+        fileName = QFileDialog.getSaveFileName(filter="JSON (*.json)")
+        if fileName[0] == "":
+            return
+        timings.export(fileName[0])
+    except Exception as e:
+        print(e)
 
 
 def saveFile():
@@ -487,138 +2114,159 @@ def saveFile():
         print(e)
 
 
-def displayRank():
-    text = ""
-    revRanks = list(trueRanks)
-    for i in range(len(revRanks)):
-        text = text + str(i) + ")\t"
-        for j in revRanks[i]:
-            text = text + str(j) + "\t"
-        text = text[:-1]
-        text = text + "\n"
-    rankDisplayWidget.setText(text)
-
-
-def correctComparisonsData(incList):
-    new_list = [list(element) for element in list(set([frozenset(element) for element in incList]))]
-    for i in new_list:
-        if len(i) < 2:
-            new_list.remove(i)
-    return new_list
+def exportSessionFile():
+    try:
+        fileName = QFileDialog.getSaveFileName(filter="RobotTinder session (*.rtcols)")
+        if fileName[0] == "":
+            return
+        exportSession(fileName[0], comparisonsData, comparisonTimes, scoutName, list(rankHistory),
+                      scoutData.matchRows if scoutData is not None else [])
+    except Exception as e:
+        print(e)
 
 
-def unorderedInList(refList, unordered):
-    for i in refList:
-        if set(i) == set(unordered):
-            return True
-    return False
+def displayRank():
+    global rankText
+    text = "".join(str(i) + ")\t" + "\t".join(map(str, group)) + "\n" for i, group in enumerate(trueRanks))
+    if text == rankText:
+        return
+    rankText = text
+    # keep the scroll position, setText jumps back to the top
+    scrollBar = rankDisplayWidget.verticalScrollBar()
+    position = scrollBar.value()
+    rankDisplayWidget.setText(text)
+    scrollBar.setValue(position)
 
 
 def getNextTeams():
-    global team1STR, team2STR, comparisonsData
-    # comparisonsData = correctComparisonsData(comparisonsData)
-    if len(comparisonsData) > 0:
-        calculateRanks()
-    teamToChooseFrom = list(map(str, Diff(list(map(int, teams)), getTeams(comparisonsData))))
-    if len(teamToChooseFrom) <= 1:
-        areSameRankTeams = False
-        for i in ranks:
-            if len(i) > 1:
-                areSameRankTeams = True
-                break
-        if not areSameRankTeams:
-            try:
-                flatComparisonsData = [j for sub in comparisonsData for j in sub]
-                random.shuffle(flatComparisonsData)
-                print("Randomized Flat Data: ", end="")
-                print(flatComparisonsData)
-                minTeam1 = flatComparisonsData[0]
-                minTeam2 = flatComparisonsData[1]
-                if flatComparisonsData.count(flatComparisonsData[0]) < flatComparisonsData.count(flatComparisonsData[1]):
-                    minTeam1 = flatComparisonsData[0]
-                    minTeam2 = flatComparisonsData[1]
-                for i in flatComparisonsData[2:]:
-                    if flatComparisonsData.count(i) < flatComparisonsData.count(minTeam2):
-                        minTeam2 = i
-                    if flatComparisonsData.count(i) < flatComparisonsData.count(minTeam1):
-                        minTeam2 = minTeam1
-                        minTeam1 = i
-                if minTeam2 == minTeam1:
-                    while minTeam2 == minTeam1:
-                        minTeam2 = random.choice(flatComparisonsData)
-
-                team1STR = str(minTeam1)
-                team2STR = str(minTeam2)
-            except Exception as e:
-                print(e)
-        else:
-            try:
-                print("Ranks: ", end="")
-                print(ranks)
-                team1STR = str(ranks[0][0])
-                if len(ranks[0]) == 1:
-                    team2STR = str(ranks[1][0])
-                else:
-                    team2STR = str(ranks[0][1])
-            except Exception as e:
-                print(e)
-        if len(teamToChooseFrom) == 1:
-            team2STR = teamToChooseFrom[0]
-
-
-    else:
-        print("Teams that have not been chosen: ", end="")
-        print(teamToChooseFrom)
-        team1STR = random.choice(teamToChooseFrom)
-        while True:
-            ranTeam = random.choice(teamToChooseFrom)
-            if not ranTeam == team1STR:
-                team2STR = ranTeam
-                break
-
-    while unorderedInList(comparisonsData, [int(team1STR), int(team2STR)]):
-        print("Error: Chose existing pair of teams")
-        team1STR = str(random.choice(teams))
-        team2STR = str(random.choice(teams))
-        while team1STR == team2STR:
-            team2STR = str(random.choice(teams))
-
-
-def calculateRanks():
-    global ranks, trueRanks
-    localTeams = getTeams(comparisonsData)
-    dataForSpring = np.zeros((len(localTeams), len(localTeams)))
-
-    for i in comparisonsData:
-        betterTeamIndex = localTeams.index(i[0])
-        worseTeamIndex = localTeams.index(i[1])
-        dataForSpring[betterTeamIndex][worseTeamIndex] = 1
-
-    rank = SpringRank(scipy.sparse.csr_matrix(dataForSpring)).tolist()
+    global team1STR, team2STR
+    comparisonLedger.addTeams(map(int, teams))
+    comparisonLedger.sync(comparisonsData)
+    pair = pairSelector.select(*rankSnapshot)
+    if pair is None:
+        print("Error: Not enough teams to choose a pair from")
+        return
+    team1STR = str(pair[0])
+    team2STR = str(pair[1])
+
+
+def solveRanks(comparisons):
+    global rankEngine
+    if rankEngine is None:
+        rankEngine = makeEngine(os.environ.get("ROBOTTINDER_ENGINE", "springrank"), cache=rankCache)
+    with timings.span("solve"):
+        rankEngine.sync(comparisons)
+        rank = rankEngine.solve()
+    timings.count(comparisons=len(comparisons), teams=len(rankEngine.teams), solverIterations=rankEngine.iterations,
+                  solverResidual=rankEngine.residual, components=getattr(rankEngine, "componentCount", 1),
+                  rankCacheHits=rankCache.hits, rankCacheMisses=rankCache.misses)
+    if not rankHistory or rankHistory[-1][0] != len(comparisons):
+        rankHistory.append((len(comparisons), list(rankEngine.teams), rank.copy()))
+    return list(rankEngine.teams), rank.copy()
+
+
+def startRanking():
+    # Queues a solve on the rank pool. Clicks made while a solve is queued supersede it, the queued
+    # solve is cancelled and the new one picks up all comparisons made so far.
+    global rankWorker
+    if rankWorker is not None:
+        rankWorker.cancel()
+    rankWorker = Worker(solveRanks, list(comparisonsData))
+    rankWorker.signals.finished.connect(showRanks)
+    rankWorker.signals.failed.connect(print)
+    rankPool.start(rankWorker)
+
+
+def speculate(pair, comparisons, ledger):
+    # Runs on the rank pool while the scout looks at pair: the ranking and the next pair for either
+    # outcome, so the click only has to commit one of them. ledger is a copy owned by this call.
+    with timings.span("speculate"):
+        solveRanks(comparisons)
+        outcomes = {}
+        for better, worse in (pair, pair[::-1]):
+            ranking = rankEngine.speculate(better, worse)
+            outcomeLedger = ledger.copy()
+            outcomeLedger.append(better, worse)
+            outcomes[(better, worse)] = (ranking, type(pairSelector)(outcomeLedger).select(*ranking))
+    return len(comparisons), outcomes
+
+
+def startSpeculation():
+    global speculationWorker, speculation
+    speculation = None
+    if speculationWorker is not None:
+        speculationWorker.cancel()
+    if team1STR == "" or team2STR == "":
+        return
+    comparisonLedger.sync(comparisonsData)
+    speculationWorker = Worker(speculate, (int(team1STR), int(team2STR)), list(comparisonsData), comparisonLedger.copy())
+    speculationWorker.signals.finished.connect(speculationDone)
+    speculationWorker.signals.failed.connect(print)
+    rankPool.start(speculationWorker)
+
+
+def speculationDone(result):
+    global speculation
+    speculation = result
+    # render the panels of both possible next pairs ahead of the click
+    nextTeams = [str(team) for ranking, pair in result[1].values() if pair is not None for team in pair]
+    bridge.prefetchTeams.emit(list(dict.fromkeys(nextTeams)))
+
+
+def speculatedOutcome(betterTeam, worseTeam):
+    # the precomputed (ranking, next pair) for the comparison just appended, None if it isn't ready
+    global speculation
+    result, speculation = speculation, None
+    if result is None or result[0] != len(comparisonsData) - 1:
+        return None
+    outcome = result[1].get((betterTeam, worseTeam))
+    if outcome is None or outcome[1] is None:
+        return None
+    return outcome
+
+
+def groupTies(localTeams, rank, tolerance=tieTolerance):
+    # teams best first, grouped where neighbouring scores are within tolerance of the score spread,
+    # so solver noise doesn't make ties appear and disappear between clicks
+    rank = np.asarray(rank)
+    if len(rank) == 0:
+        return []
+    order = np.argsort(-rank, kind="stable")
+    gaps = -np.diff(rank[order])
+    breaks = np.flatnonzero(gaps > tolerance * max(np.ptp(rank), 1.)) + 1
+    return [group.tolist() for group in np.split(np.asarray(localTeams)[order], breaks)]
+
+
+def showRanks(result):
+    global trueRanks, rankSnapshot
+    rankSnapshot = result
+    with timings.span("showRanks"):
+        trueRanks = groupTies(*result)
+        displayRank()
+    updateTimings()
 
-    rankTeams = []
-    for i in range(len(rank)):
-        rankTeams.append([rank[i], localTeams[i]])
-    rankTeams = sorted(rankTeams, key=lambda row: row[0])
-    try:
-        rankTeams.reverse()
-        last = 0
-        i = 0
-        ranks = []
-        for ii in rankTeams:
-            if i != 0 and last == ii[0]:
-                ranks[i - 1].append(ii[1])
-            else:
-                ranks.append([ii[1]])
-                i = i + 1
 
-            last = ii[0]
-        trueRanks = list(ranks)
-        ranks = sorted(ranks, key=len)
-        ranks.reverse()
-        displayRank()
-    except Exception as e:
-        print(e)
+def startBootstrap():
+    global bootstrapWorker
+    if bootstrapWorker is not None or len(comparisonsData) == 0:
+        return
+    # spawn instead of fork, forking the multi-threaded Qt process is not safe
+    bootstrapWorker = Worker(bootstrapSpringRank, list(comparisonsData), bootstrapSamples,
+                             context=multiprocessing.get_context("spawn"))
+    bootstrapWorker.signals.finished.connect(showBootstrap)
+    bootstrapWorker.signals.failed.connect(showBootstrap)
+    fetchPool.start(bootstrapWorker)
+
+
+def showBootstrap(result):
+    global bootstrapWorker, rankText
+    bootstrapWorker = None
+    if isinstance(result, str):
+        print(result)
+        return
+    # shown until the next ranking update replaces it with the plain ranking
+    rankText = ""
+    rankDisplayWidget.setText(bootstrapText(result))
 
 
 def submitTeam1():
@@ -630,37 +2278,322 @@ def submitTeam2():
 
 
 def submitTeam(betterTeam, worseTeam):
+    global team1STR, team2STR
     if team1STR == "" or team2STR == "":
         return
-    comparisonsData.append([int(betterTeam), int(worseTeam)])
-    createPage()
-
-
-openFile = QFileDialog.getOpenFileName()
-if openFile[0] != "":
-    openedFile = open(openFile[0], 'r')
-    Lines = openedFile.readlines()
-    for i in Lines:
-        comparisonsData.append(list(map(int, i.replace("\n", "").split(">"))))
-
-print(comparisonsData)
-
-web.setHtml(html)
-submit.clicked.connect(submitLink)
-team1.clicked.connect(submitTeam1)
-team2.clicked.connect(submitTeam2)
-saveFileButton.clicked.connect(saveFile)
-
-web.setFixedHeight(int(app.primaryScreen().size().height() * .75))
-leftLayout.addWidget(top, 0, 0)
-leftLayout.addWidget(web, 2, 0)
-left.setLayout(leftLayout)
-
-layout.addWidget(left, 0, 0)
-layout.addWidget(rankDisplayScroll, 0, 1)
-layout.setAlignment(Qt.AlignTop)
-win.setLayout(layout)
-win.setWindowTitle("Robot Tinder")
-win.show()
-sys.exit(app.exec_())
+    with timings.span("click"):
+        comparisonsData.append([int(betterTeam), int(worseTeam)])
+        comparisonTimes.append(time.time())
+        try:
+            journal.sync(comparisonsData)
+        except OSError as e:
+            print(e)
+        outcome = speculatedOutcome(int(betterTeam), int(worseTeam))
+        timings.count(speculated=int(outcome is not None))
+        # the real solve still runs, the engine has to take the comparison in and it may differ from
+        # the speculated ranking within the solver tolerance
+        startRanking()
+        if outcome is None:
+            createPage()
+        else:
+            ranking, pair = outcome
+            comparisonLedger.sync(comparisonsData)
+            showRanks(ranking)
+            team1STR = str(pair[0])
+            team2STR = str(pair[1])
+            showPair()
+        pushComparisons()
+    updateTimings()
+
+
+def pushComparisons():
+    # one push at a time, comparisons made while it runs go out with the next one
+    global mergeWorker
+    if mergeClient is None or mergeWorker is not None:
+        return
+    mergeWorker = Worker(mergeClient.sync, list(comparisonsData))
+    mergeWorker.signals.finished.connect(mergePushed)
+    mergeWorker.signals.failed.connect(mergePushed)
+    fetchPool.start(mergeWorker)
+
+
+def mergePushed(result):
+    global mergeWorker
+    mergeWorker = None
+    if isinstance(result, str):
+        print("Error: Could not push comparisons to the merge server. " + result)
+    elif result < len(comparisonsData):
+        pushComparisons()
+
+
+def loadComparisons(path):
+    # reads a better>worse file as written by saveFile, a numpy snapshot of team pairs or the
+    # comparisons of a session exported with exportSession
+    if path.endswith(".npy"):
+        return np.load(path).tolist()
+    if isColumnsFile(path):
+        comparisons = loadColumns(path)[0]["comparisons"]
+        return np.column_stack((comparisons["better"], comparisons["worse"])).tolist()
+    with open(path, 'r') as file:
+        values = np.array(file.read().replace(">", " ").split(), dtype=np.int64)
+    return values.reshape(-1, 2).tolist()
+
+
+def rankComparisons(comparisons, alpha=0., engine="springrank", rankCacheDir=None):
+    # [(team, score)] best first, with rankCacheDir rankings of comparison sets ranked before are read from there
+    engine = makeEngine(engine, alpha, cache=RankCache(directory=rankCacheDir) if rankCacheDir else None)
+    engine.sync(comparisons)
+    rank = engine.solve()
+    return sorted(zip(engine.teams, rank.tolist()), key=lambda row: row[1], reverse=True)
+
+
+def rankFile(path, alpha=0., engine="springrank", rankCacheDir=None):
+    return path, rankComparisons(loadComparisons(path), alpha, engine, rankCacheDir)
+
+
+def compareText(teams, scores):
+    # one row per team ordered by the first engine, with each engine's rank, then the Kendall tau of
+    # every engine against the first
+    names = list(scores)
+    ranks = {name: np.argsort(np.argsort(-scores[name], kind="stable"), kind="stable") for name in names}
+    text = "team\t" + "\t".join(names) + "\n"
+    for i in np.argsort(ranks[names[0]]):
+        text += str(teams[i]) + "\t" + "\t".join(str(ranks[name][i]) for name in names) + "\n"
+    for name in names[1:]:
+        text += "kendall tau {0} vs {1}: {2:.3f}\n".format(name, names[0], kendallTau(scores[names[0]], scores[name]))
+    return text
+
+
+def rankMain(argv):
+    # Headless ranking of saved comparison files, without starting Qt:
+    #   python RobotTinder.py rank event1.txt event2.txt [--each] [--jobs N] [--engine elo] [--output ranks.csv]
+    #   python RobotTinder.py rank event1.txt --compare   (every engine side by side)
+    parser = argparse.ArgumentParser(prog="RobotTinder.py rank", description="Rank saved better>worse comparison files")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--each", action="store_true", help="rank every file on its own instead of merging them")
+    parser.add_argument("--jobs", type=int, default=None, help="processes used with --each (default: all cores)")
+    parser.add_argument("--alpha", type=float, default=0.)
+    parser.add_argument("--engine", choices=list(rankingEngines), default="springrank")
+    parser.add_argument("--cache", metavar="DIR", help="keep SpringRank results in DIR and reuse them for comparison sets ranked before")
+    parser.add_argument("--compare", nargs="*", choices=list(rankingEngines), metavar="ENGINE",
+                        help="rank the merged files with several engines (default: all) and compare their orders")
+    parser.add_argument("--output", help="write a csv file instead of printing")
+    parser.add_argument("--bootstrap", type=int, default=0, metavar="N",
+                        help="also report score intervals and P(beats next) from N resamples of the comparisons")
+    parser.add_argument("--level", type=float, default=0.9, help="coverage of the bootstrap intervals")
+    args = parser.parse_args(argv)
+
+    if args.bootstrap > 0:
+        if args.each:
+            parser.error("--bootstrap can't be combined with --each")
+        comparisons = []
+        for i in args.files:
+            comparisons.extend(loadComparisons(i))
+        result = bootstrapSpringRank(comparisons, args.bootstrap, args.alpha, level=args.level, jobs=args.jobs)
+        if args.output:
+            with open(args.output, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(["rank", "team", "score", "lower", "upper", "beatsNext"])
+                for i, row in enumerate(bootstrapTable(result)):
+                    writer.writerow([i] + list(row))
+        else:
+            print(bootstrapText(result), end="")
+        return 0
+
+    if args.compare is not None:
+        if args.each:
+            parser.error("--compare can't be combined with --each")
+        comparisons = []
+        for i in args.files:
+            comparisons.extend(loadComparisons(i))
+        teams, scores = compareEngines(comparisons, args.compare, args.alpha)
+        if args.output:
+            with open(args.output, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(["team"] + list(scores))
+                for i, team in enumerate(teams):
+                    writer.writerow([team] + [scores[name][i] for name in scores])
+        else:
+            print(compareText(teams, scores), end="")
+        return 0
+
+    if args.each:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(rankFile, args.files, [args.alpha] * len(args.files),
+                                    [args.engine] * len(args.files), [args.cache] * len(args.files)))
+    else:
+        comparisons = []
+        for i in args.files:
+            comparisons.extend(loadComparisons(i))
+        results = [("merged", rankComparisons(comparisons, args.alpha, args.engine, args.cache))]
+
+    if args.output:
+        with open(args.output, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["file", "rank", "team", "score"])
+            for path, ranking in results:
+                for i, (team, score) in enumerate(ranking):
+                    writer.writerow([path, i, team, score])
+        return 0
+
+    for path, ranking in results:
+        if args.each:
+            print(path)
+        for i, (team, score) in enumerate(ranking):
+            print(str(i) + ")\t" + str(team) + "\t" + "{:.4f}".format(score))
+    return 0
+
+
+def main():
+    global app, fetchPool, rankPool, win, leftLayout, linkEntry, rankDisplayWidget, team1, team2, timingLabel, pollTimer
+    importQt()
+    # QtWebEngineWidgets has to be imported before the QApplication exists, the view itself is created
+    # once the window is up, see finishStartup
+    importlib.import_module("PyQt5.QtWebEngineWidgets")
+    app = QApplication(sys.argv)
+    fetchPool = QThreadPool()
+    # a single thread so the rank engine is only ever used by one solve at a time
+    rankPool = QThreadPool()
+    rankPool.setMaxThreadCount(1)
+    win = QWidget()
+    layout = QGridLayout()
+    rankDisplayScroll = QScrollArea()
+    rankDisplayScroll.setFixedWidth(int(app.primaryScreen().size().width() / 9))
+    rankDisplayLayout = QGridLayout()
+
+    top = QWidget()
+    topLayout = QGridLayout()
+    left = QWidget()
+    leftLayout = QGridLayout()
+    row1 = QWidget()
+    row1Layout = QGridLayout()
+    row2 = QWidget()
+    row2Layout = QGridLayout()
+
+    linkEntry = QLineEdit()
+    # linkEntry.setText("https://script.google.com/macros/s/AKfycbzbVJ03rdYPL7VORjsFZgu6AU4UnLAGrPAgFeCzBJoAOqnA3C4rf1JX/exec")
+    submit = QPushButton("Enter Link", win)
+    rankDisplayWidget = QTextEdit()
+    saveFileButton = QPushButton("Save")
+    exportSessionButton = QPushButton("Export Session")
+    bootstrapButton = QPushButton("Confidence")
+    timingLabel = QLabel()
+    exportTimingsButton = QPushButton("Export Timings")
+    rankDisplayScroll.setWidgetResizable(True)
+    rankDisplayLayout.addWidget(rankDisplayWidget, 1, 0)
+    rankDisplayLayout.addWidget(saveFileButton, 0, 0)
+    rankDisplayLayout.addWidget(bootstrapButton, 2, 0)
+    rankDisplayLayout.addWidget(timingLabel, 3, 0)
+    rankDisplayLayout.addWidget(exportTimingsButton, 4, 0)
+    rankDisplayLayout.addWidget(exportSessionButton, 5, 0)
+    rankDisplayScroll.setLayout(rankDisplayLayout)
+
+    row1Layout.addWidget(linkEntry, 0, 0)
+    row1Layout.addWidget(submit, 0, 1)
+    row1Layout.setSpacing(0)
+    row1Layout.setAlignment(Qt.AlignTop)
+    row1.setLayout(row1Layout)
+
+    team1 = QPushButton("Team 1", win)
+    team2 = QPushButton("Team 2", win)
+    row2Layout.addWidget(team1, 0, 0)
+    row2Layout.addWidget(team2, 0, 1)
+    row2Layout.setAlignment(Qt.AlignTop)
+    row2.setLayout(row2Layout)
+
+    topLayout.addWidget(row1, 0, 0)
+    topLayout.addWidget(row2, 1, 0)
+    topLayout.setAlignment(Qt.AlignTop)
+    top.setLayout(topLayout)
+
+    submit.clicked.connect(submitLink)
+    team1.clicked.connect(submitTeam1)
+    team2.clicked.connect(submitTeam2)
+    saveFileButton.clicked.connect(saveFile)
+    exportSessionButton.clicked.connect(exportSessionFile)
+    bootstrapButton.clicked.connect(startBootstrap)
+    exportTimingsButton.clicked.connect(exportTimings)
+    app.aboutToQuit.connect(timings.dumpProfile)
+
+    leftLayout.addWidget(top, 0, 0)
+    left.setLayout(leftLayout)
+
+    layout.addWidget(left, 0, 0)
+    layout.addWidget(rankDisplayScroll, 0, 1)
+    layout.setAlignment(Qt.AlignTop)
+    win.setLayout(layout)
+    win.setWindowTitle("Robot Tinder")
+    if pollInterval > 0:
+        pollTimer = QTimer()
+        pollTimer.timeout.connect(pollScoutData)
+        pollTimer.start(int(pollInterval * 1000))
+    win.show()
+    startupMark("windowShown")
+    QTimer.singleShot(0, finishStartup)
+    return app.exec_()
+
+
+def startupMark(name):
+    # read by bench_startup.py
+    if startupBenchmark:
+        print("ROBOTTINDER_STARTUP {0} {1}".format(name, time.time()), flush=True)
+
+
+def finishStartup():
+    # runs from the event loop once the window is shown
+    global web, bridge, mergeClient
+    from PyQt5.QtWebEngineWidgets import QWebEngineView
+    from PyQt5.QtWebChannel import QWebChannel
+    web = QWebEngineView()
+    web.setFixedHeight(int(app.primaryScreen().size().height() * .75))
+    bridge = PageBridge()
+    channel = QWebChannel(web.page())
+    channel.registerObject("bridge", bridge)
+    web.page().setWebChannel(channel)
+    web.loadFinished.connect(lambda ok: startupMark("webLoaded"))
+    web.setHtml(html)
+    leftLayout.addWidget(web, 2, 0)
+    startupMark("webViewCreated")
+    if startupBenchmark:
+        np.zeros(0)
+        scipy.sparse.linalg.bicgstab
+        startupMark("numericsLoaded")
+        web.loadFinished.connect(lambda ok: app.quit())
+        return
+
+    recovered = journal.load()
+    restore = len(recovered) > 0 and QMessageBox.question(
+        win, "Robot Tinder", "Restore the {0} comparisons of the last session?".format(len(recovered))) == QMessageBox.Yes
+    if not restore or journal.sessionId is None:
+        journal.newSession()
+    if os.environ.get("ROBOTTINDER_MERGE_SERVER"):
+        # a restored session keeps its id, so the merge server skips what it already has
+        mergeClient = MergeClient(os.environ["ROBOTTINDER_MERGE_SERVER"], scoutName, journal.sessionId)
+    if restore:
+        comparisonsLoaded(recovered, compact=False)
+        return
+    openFile = QFileDialog.getOpenFileName()
+    if openFile[0] == "":
+        journal.compact(comparisonsData)
+        return
+    worker = Worker(loadComparisons, openFile[0])
+    worker.signals.finished.connect(comparisonsLoaded)
+    worker.signals.failed.connect(print)
+    fetchPool.start(worker)
+
+
+def comparisonsLoaded(comparisons, compact=True):
+    comparisonsData.extend(comparisons)
+    comparisonTimes.extend([float("nan")] * len(comparisons))
+    if compact:
+        journal.compact(comparisonsData)
+    print(comparisonsData)
+    if len(comparisonsData) > 0:
+        startRanking()
+        pushComparisons()
+
 
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "rank":
+        sys.exit(rankMain(sys.argv[2:]))
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import scipy
+import scipy.sparse
+
+from RobotTinder import build_from_dense, build_from_sparse, clear_factorizations, solve_linear_system
+
+# Benchmark for the SpringRank core. Generates synthetic tournament comparison graphs and times
+# build_from_sparse/build_from_dense and solve_linear_system separately for every combination of
+# graph, size, alpha, solver and force_dense, e.g.
+#   python bench_springrank.py --sizes 40 200 1000 10000 --output bench_results.json
+
+densities = {
+    "sparse": None,  # every team takes part in about comparisonsPerTeam comparisons
+    "dense": 0.3,  # fraction of all possible pairs that were compared
+    "near-complete": 0.95,
+}
+
+
+def tournamentGraph(n, kind, comparisonsPerTeam=10, seed=0):
+    # adjacency matrix A[better, worse] of a simulated event with hidden team strengths
+    rng = np.random.default_rng(seed)
+    strength = rng.normal(size=n)
+    if densities[kind] is None:
+        m = n * comparisonsPerTeam // 2
+        i = rng.integers(0, n, m)
+        j = rng.integers(0, n - 1, m)
+        j[j >= i] += 1
+    else:
+        i, j = np.triu_indices(n, 1)
+        keep = rng.random(len(i)) < densities[kind]
+        i = i[keep]
+        j = j[keep]
+    # noisy outcome, the stronger team wins more often
+    iWins = rng.random(len(i)) < 1 / (1 + np.exp(strength[j] - strength[i]))
+    better = np.where(iWins, i, j)
+    worse = np.where(iWins, j, i)
+    return scipy.sparse.coo_matrix((np.ones(len(better)), (better, worse)), shape=(n, n)).tocsr()
+
+
+def measure(fn, *args):
+    # (seconds, peak traced bytes, result)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def benchCase(A, alpha, solver, forceDense, repeat):
+    if forceDense:
+        A = A.toarray()
+    build = build_from_dense if forceDense else build_from_sparse
+    buildTimes = []
+    solveTimes = []
+    buildPeak = 0
+    solvePeak = 0
+    for _ in range(repeat):
+        seconds, peak, (M, B) = measure(build, A, alpha, 1., 1.)
+        buildTimes.append(seconds)
+        buildPeak = max(buildPeak, peak)
+        # every repeat factorizes again instead of timing a cached factorization
+        clear_factorizations()
+        seconds, peak, rank = measure(solve_linear_system, M, B, solver, False)
+        solveTimes.append(seconds)
+        solvePeak = max(solvePeak, peak)
+    residual = float(np.linalg.norm(M @ rank - B) / max(np.linalg.norm(B), 1e-300))
+    return {
+        "buildSeconds": min(buildTimes),
+        "buildSecondsMedian": float(np.median(buildTimes)),
+        "solveSeconds": min(solveTimes),
+        "solveSecondsMedian": float(np.median(solveTimes)),
+        "buildPeakBytes": buildPeak,
+        "solvePeakBytes": solvePeak,
+        "operatorNnz": int(M.nnz) if scipy.sparse.issparse(M) else int(np.count_nonzero(M)),
+        "relativeResidual": residual,
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark SpringRank assembly and solve on synthetic tournaments")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[40, 200, 1000, 10000])
+    parser.add_argument("--graphs", nargs="+", default=list(densities), choices=list(densities))
+    parser.add_argument("--alphas", type=float, nargs="+", default=[0., 1.])
+    parser.add_argument("--solvers", nargs="+", default=["spsolve", "bicgstab", "auto"])
+    parser.add_argument("--force-dense", choices=["no", "yes", "both"], default="both")
+    parser.add_argument("--max-dense-size", type=int, default=2000,
+                        help="largest team count for dense graphs and force_dense runs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    forceDense = {"no": [False], "yes": [True], "both": [False, True]}[args.force_dense]
+    results = []
+    for kind, n in itertools.product(args.graphs, args.sizes):
+        if densities[kind] is not None and n > args.max_dense_size:
+            continue
+        A = tournamentGraph(n, kind, seed=args.seed)
+        for alpha, solver, dense in itertools.product(args.alphas, args.solvers, forceDense):
+            if dense and n > args.max_dense_size:
+                continue
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                result = benchCase(A, alpha, solver, dense, args.repeat)
+            result.update({"graph": kind, "teams": n, "comparisons": int(A.sum()), "alpha": alpha,
+                           "solver": solver, "forceDense": dense})
+            results.append(result)
+            print("{graph:>13} n={teams:<6} m={comparisons:<9} alpha={alpha:<4} {solver:>8} dense={forceDense!s:<5} "
+                  "build {buildSeconds:.4f}s {buildPeakBytes}B  solve {solveSeconds:.4f}s {solvePeakBytes}B  "
+                  "residual {relativeResidual:.1e}".format(**result))
+
+    with open(args.output, "w") as file:
+        json.dump({"python": sys.version, "numpy": np.__version__, "scipy": scipy.__version__,
+                   "machine": platform.platform(), "results": results}, file, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
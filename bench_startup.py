@@ -0,0 +1,61 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Measures how long RobotTinder takes to start. Every run launches the app with ROBOTTINDER_STARTUP_BENCH=1,
+# which skips the session restore and file dialogs, prints a timestamp at each startup stage and quits
+# once the page is loaded. Times are seconds since the process was launched, e.g.
+#   python bench_startup.py --runs 5 --offscreen --output startup.json
+
+here = os.path.dirname(os.path.abspath(__file__))
+stages = ["import", "windowShown", "webViewCreated", "numericsLoaded", "webLoaded"]
+
+
+def runOnce(offscreen, timeout):
+    env = dict(os.environ, ROBOTTINDER_STARTUP_BENCH="1")
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    marks = {}
+
+    start = time.time()
+    subprocess.run([sys.executable, "-c", "import RobotTinder"], cwd=here, env=env, check=True, timeout=timeout)
+    marks["import"] = time.time() - start
+
+    start = time.time()
+    out = subprocess.run([sys.executable, os.path.join(here, "RobotTinder.py")], cwd=here, env=env, timeout=timeout,
+                         stdout=subprocess.PIPE, universal_newlines=True).stdout
+    for line in out.splitlines():
+        if line.startswith("ROBOTTINDER_STARTUP "):
+            name, timestamp = line.split()[1:]
+            marks[name] = float(timestamp) - start
+    return marks
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Measure RobotTinder startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--offscreen", action="store_true", help="use the offscreen Qt platform (no display needed)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="write all runs and medians as json")
+    args = parser.parse_args(argv)
+
+    runs = [runOnce(args.offscreen, args.timeout) for _ in range(args.runs)]
+    medians = {}
+    for stage in stages:
+        values = [run[stage] for run in runs if stage in run]
+        if values:
+            medians[stage] = statistics.median(values)
+            print("{0:>15}: {1:.3f}s".format(stage, medians[stage]))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"python": sys.version, "runs": runs, "median": medians}, file, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,135 @@
+import argparse
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from RobotTinder import makeEngine, rankingEngines
+
+# Aggregates the comparisons of several RobotTinder clients into one ranking (SpringRank unless --engine says otherwise).
+#   python merge_server.py --port 8765 --weight lead-scout=2
+# Clients started with ROBOTTINDER_MERGE_SERVER=http://<host>:8765 push their comparisons to it.
+#
+#   POST /comparisons  {"scout": "name", "session": "id", "start": 40, "comparisons": [[better, worse], ...]}
+#       start is the index of the first comparison in that session of the scout, entries the server
+#       already has are skipped so retries are safe. A scout that restarts the app sends a new session
+#       id and its comparisons count from 0 again. Answers {"count": comparisons received in that
+#       session}, with status 409 when start is past that count and the client has to resend from there.
+#   GET /ranking       {"comparisons": n, "ranking": [{"team": 254, "score": 0.8}, ...]} best first
+#   GET /scouts        {"name": comparisons received over all sessions, ...}
+
+
+class MergeState:
+    def __init__(self, alpha=0., weights=None, engine="springrank"):
+        self.lock = threading.Lock()
+        self.engine = makeEngine(engine, alpha)
+        self.weights = weights or {}
+        self.scouts = {}
+        self.sessions = {}  # (scout, session) -> comparisons received
+        self.ranking = None
+
+    def push(self, scout, start, comparisons, session=""):
+        # (accepted, number of comparisons received in this session of scout)
+        with self.lock:
+            count = self.sessions.get((scout, session), 0)
+            if start > count:
+                return False, count
+            new = comparisons[count - start:]
+            weight = self.weights.get(scout, 1.)
+            for better, worse in new:
+                self.engine.addComparison(int(better), int(worse), weight)
+            self.sessions[scout, session] = count + len(new)
+            self.scouts[scout] = self.scouts.get(scout, 0) + len(new)
+            if new:
+                self.ranking = None
+            return True, self.sessions[scout, session]
+
+    def getRanking(self):
+        # solved lazily and kept until new comparisons arrive, warm-started from the last solve
+        with self.lock:
+            if self.ranking is None:
+                rank = self.engine.solve().tolist()
+                ranking = sorted(zip(self.engine.teams, rank), key=lambda row: row[1], reverse=True)
+                self.ranking = [{"team": team, "score": score} for team, score in ranking]
+            return {"comparisons": len(self.engine.store), "ranking": self.ranking}
+
+    def getScouts(self):
+        with self.lock:
+            return dict(self.scouts)
+
+
+class MergeHandler(BaseHTTPRequestHandler):
+    def sendJson(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/ranking":
+            self.sendJson(200, self.server.state.getRanking())
+        elif self.path == "/scouts":
+            self.sendJson(200, self.server.state.getScouts())
+        else:
+            self.sendJson(404, {"error": "unknown path " + self.path})
+
+    def do_POST(self):
+        if self.path != "/comparisons":
+            self.sendJson(404, {"error": "unknown path " + self.path})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            scout = str(body["scout"])
+            session = str(body.get("session", ""))
+            start = int(body["start"])
+            comparisons = [[int(i[0]), int(i[1])] for i in body["comparisons"]]
+        except (ValueError, KeyError, TypeError, IndexError) as e:
+            self.sendJson(400, {"error": "bad request: " + str(e)})
+            return
+        accepted, count = self.server.state.push(scout, start, comparisons, session)
+        self.sendJson(200 if accepted else 409, {"count": count})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def makeServer(host="127.0.0.1", port=8765, alpha=0., weights=None, verbose=False, engine="springrank"):
+    # port 0 picks a free port, see server.server_address
+    server = ThreadingHTTPServer((host, port), MergeHandler)
+    server.daemon_threads = True
+    server.state = MergeState(alpha, weights, engine)
+    server.verbose = verbose
+    return server
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Merge the comparisons of several RobotTinder scouts")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--alpha", type=float, default=0.)
+    parser.add_argument("--engine", choices=list(rankingEngines), default="springrank")
+    parser.add_argument("--weight", action="append", default=[], metavar="SCOUT=WEIGHT",
+                        help="weight of the comparisons of one scout (default 1)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    weights = {}
+    for i in args.weight:
+        scout, weight = i.rsplit("=", 1)
+        weights[scout] = float(weight)
+
+    server = makeServer(args.host, args.port, args.alpha, weights, args.verbose, args.engine)
+    print("Merging comparisons on http://{0}:{1}".format(*server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,139 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from RobotTinder import ClosestScorePairSelector, ComparisonLedger, LeastComparedPairSelector, PairSelector, \
+    kendallTau, makeEngine, rankingEngines
+
+# Headless scouting session: teams get hidden strengths, a noisy oracle answers every pair the selector
+# asks for and the ranking engine is re-solved after each answer, just like a click in the GUI. Reports
+# how many clicks it takes to reach a given Kendall tau against the true order and the latency of every
+# step, e.g.
+#   python simulate_scouting.py --teams 60 --clicks 2000 --selectors closest least random --output sim.json
+
+
+class RandomPairSelector(PairSelector):
+    # baseline: any two different teams
+    def __init__(self, ledger, seed=0):
+        super().__init__(ledger)
+        self.rng = np.random.default_rng(seed)
+
+    def select(self, teams, scores):
+        pair = self.rng.choice(len(self.ledger.teams), 2, replace=False)
+        return self.ledger.teams[pair[0]], self.ledger.teams[pair[1]]
+
+
+selectors = {
+    "closest": ClosestScorePairSelector,
+    "least": LeastComparedPairSelector,
+    "random": RandomPairSelector,
+}
+
+
+def fullScores(n, teams, scores):
+    # scores of all n teams, teams the engine hasn't seen yet get the mean score
+    out = np.full(n, np.mean(scores) if len(scores) else 0.)
+    out[np.asarray(teams, dtype=int)] = scores
+    return out
+
+
+def simulate(n, clicks, selector="closest", engine="springrank", noise=1., seed=0, every=50):
+    # The oracle picks the better team with probability 1 / (1 + exp(-(s_i - s_j) / noise)), strengths are
+    # standard normal, so noise around 1 is an event where close teams are a coin flip
+    rng = np.random.default_rng(seed)
+    strength = rng.normal(size=n)
+    ledger = ComparisonLedger()
+    ledger.addTeams(range(n))
+    pairSelector = RandomPairSelector(ledger, seed) if selector == "random" else selectors[selector](ledger)
+    rankEngine = makeEngine(engine)
+    comparisons = []
+    snapshot = ([], [])
+    selectSeconds = []
+    solveSeconds = []
+    taus = []
+    for click in range(1, clicks + 1):
+        start = time.perf_counter()
+        ledger.sync(comparisons)
+        pair = pairSelector.select(*snapshot)
+        selectSeconds.append(time.perf_counter() - start)
+
+        i, j = pair
+        if rng.random() < 1 / (1 + np.exp(-(strength[i] - strength[j]) / noise)):
+            comparisons.append([i, j])
+        else:
+            comparisons.append([j, i])
+
+        start = time.perf_counter()
+        rankEngine.sync(comparisons)
+        snapshot = (list(rankEngine.teams), rankEngine.solve().copy())
+        solveSeconds.append(time.perf_counter() - start)
+
+        if click % every == 0 or click == clicks:
+            taus.append((click, kendallTau(strength, fullScores(n, *snapshot))))
+    return {"selectSeconds": selectSeconds, "solveSeconds": solveSeconds, "tau": taus}
+
+
+def clicksTo(taus, target):
+    for click, tau in taus:
+        if tau >= target:
+            return click
+    return None
+
+
+def summarize(runs, targets):
+    select = np.concatenate([run["selectSeconds"] for run in runs])
+    solve = np.concatenate([run["solveSeconds"] for run in runs])
+    total = select + solve
+    summary = {"finalTau": float(np.mean([run["tau"][-1][1] for run in runs]))}
+    for target in targets:
+        reached = [clicksTo(run["tau"], target) for run in runs]
+        # median over the runs that got there
+        summary["clicksToTau{0}".format(target)] = float(np.median([i for i in reached if i is not None])) \
+            if any(i is not None for i in reached) else None
+    for name, values in (("select", select), ("solve", solve), ("step", total)):
+        summary[name + "MsP50"] = float(np.percentile(values, 50) * 1000)
+        summary[name + "MsP95"] = float(np.percentile(values, 95) * 1000)
+        summary[name + "MsMax"] = float(np.max(values) * 1000)
+    return summary
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Simulate scouting sessions to compare pair selectors and ranking engines")
+    parser.add_argument("--teams", type=int, default=60)
+    parser.add_argument("--clicks", type=int, default=2000)
+    parser.add_argument("--selectors", nargs="+", default=["closest"], choices=list(selectors))
+    parser.add_argument("--engines", nargs="+", default=["springrank"], choices=list(rankingEngines))
+    parser.add_argument("--noise", type=float, default=1., help="oracle noise, 0 would always pick the stronger team")
+    parser.add_argument("--runs", type=int, default=3, help="sessions per combination, with different strengths")
+    parser.add_argument("--every", type=int, default=50, help="clicks between Kendall tau measurements")
+    parser.add_argument("--targets", type=float, nargs="+", default=[0.7, 0.8])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write every run and the summaries as json")
+    args = parser.parse_args(argv)
+
+    results = []
+    for selector in args.selectors:
+        for engine in args.engines:
+            runs = [simulate(args.teams, args.clicks, selector, engine, args.noise, args.seed + k, args.every)
+                    for k in range(args.runs)]
+            summary = summarize(runs, args.targets)
+            summary.update({"selector": selector, "engine": engine})
+            results.append({"summary": summary, "tau": [run["tau"] for run in runs]})
+            print("{selector:>8} {engine:>13}  tau {finalTau:.3f}  ".format(**summary) +
+                  "  ".join("clicks to {0}: {1}".format(target, summary["clicksToTau{0}".format(target)])
+                            for target in args.targets) +
+                  "  step p50 {stepMsP50:.2f} ms p95 {stepMsP95:.2f} ms max {stepMsMax:.2f} ms".format(**summary))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"python": sys.version, "machine": platform.platform(), "arguments": vars(args),
+                       "results": results}, file, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,7 @@
+import random
+
+
+def randomComparisons(teams, count, seed=0):
+    # [[better, worse], ...] between random pairs of teams 0..teams-1
+    rng = random.Random(seed)
+    return [rng.sample(range(teams), 2) for _ in range(count)]
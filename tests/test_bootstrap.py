@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from RobotTinder import ComparisonStore, IncrementalSpringRank, LaplacianPattern, bootstrapSpringRank
+from tests.helpers import randomComparisons
+
+
+class BootstrapTest(unittest.TestCase):
+    def test_resamples_that_split_the_graph_are_solved(self):
+        comparisons = randomComparisons(24, 40, seed=1)
+        store = ComparisonStore()
+        store.extend(comparisons)
+        pattern = LaplacianPattern(store.rows, store.cols, len(store.teams))
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            weights = np.bincount(rng.integers(0, 40, 40), minlength=40).astype(float)
+            rank, converged, components = pattern.solve(weights)
+            A, B = pattern.assemble(weights)
+            self.assertTrue(converged)
+            self.assertLess(np.linalg.norm(A @ rank - B), 1e-6 * np.linalg.norm(B))
+
+    def test_scores_match_the_engine(self):
+        comparisons = randomComparisons(24, 40, seed=1)
+        engine = IncrementalSpringRank()
+        engine.sync(comparisons)
+        result = bootstrapSpringRank(comparisons, 20, jobs=1)
+        self.assertEqual(result.teams, list(engine.teams))
+        np.testing.assert_allclose(result.scores, engine.solve(), atol=1e-8)
+        self.assertEqual(result.dropped, 0)
+        self.assertEqual(len(result.samples), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import RobotTinder
+from RobotTinder import ScoutDataParser, fetchScoutData
+
+payload = ("254/\\1114<>" + "UNIQUE1" * 7 + '{"team": 254, "match": "Q1", "auto": "3"}<>'
+           + "UNIQUE2" + '{"team": 1114, "dtType": "swerve"}')
+
+
+class PayloadHandler(BaseHTTPRequestHandler):
+    # a stand-in for the web app without ETags, like Apps Script
+    def do_GET(self):
+        body = self.server.payload.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FetchScoutDataTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cacheDir = mock.patch.object(RobotTinder, "cacheDir", self.directory.name)
+        self.cacheDir.start()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), PayloadHandler)
+        self.server.payload = payload
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.link = "http://127.0.0.1:{0}/exec?data={{}}".format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.cacheDir.stop()
+        self.directory.cleanup()
+
+    def test_unchanged_payload_is_not_parsed_again(self):
+        first = fetchScoutData(self.link)
+        self.assertEqual(first.teams, ["254", "1114"])
+        self.assertEqual([row.team for row in first.matchRows], ["254"])
+        self.assertEqual([row.team for row in first.pitRows], ["1114"])
+        with mock.patch.object(ScoutDataParser, "feed") as feed:
+            second = fetchScoutData(self.link)
+        feed.assert_not_called()
+        self.assertEqual(second, first)
+
+    def test_changed_payload_is_parsed(self):
+        fetchScoutData(self.link)
+        self.server.payload = payload.replace('"Q1"', '"Q2"')
+        data = fetchScoutData(self.link)
+        self.assertEqual([row.match for row in data.matchRows], ["Q2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from RobotTinder import ComparisonJournal
+
+
+class ComparisonJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "session.journal")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def reload(self):
+        return ComparisonJournal(self.path).load()
+
+    def test_sync_and_reload(self):
+        journal = ComparisonJournal(self.path)
+        comparisons = [[1, 2], [3, 4], [5, 6]]
+        journal.sync(comparisons)
+        self.assertEqual(self.reload(), comparisons)
+
+    def test_reload_after_compact(self):
+        journal = ComparisonJournal(self.path)
+        journal.compactEvery = 2
+        comparisons = [[1, 2], [3, 4], [5, 6], [7, 8], [9, 10]]
+        for i in range(1, len(comparisons) + 1):
+            journal.sync(comparisons[:i])
+        self.assertTrue(os.path.exists(journal.snapshotPath))
+        self.assertEqual(self.reload(), comparisons)
+
+    def test_torn_last_line_is_dropped_and_appends_survive(self):
+        journal = ComparisonJournal(self.path)
+        comparisons = [[1, 2], [3, 4], [5, 6]]
+        journal.sync(comparisons)
+        journal.file.close()
+        with open(self.path, "a") as file:
+            file.write("3 7>")
+
+        restored = ComparisonJournal(self.path)
+        comparisons = restored.load()
+        self.assertEqual(comparisons, [[1, 2], [3, 4], [5, 6]])
+        comparisons += [[9, 10], [11, 12]]
+        restored.sync(comparisons)
+        restored.file.close()
+        self.assertEqual(self.reload(), [[1, 2], [3, 4], [5, 6], [9, 10], [11, 12]])
+
+    def test_session_id_survives_a_restore(self):
+        journal = ComparisonJournal(self.path)
+        sessionId = journal.newSession()
+        journal.sync([[1, 2]])
+        journal.file.close()
+        restored = ComparisonJournal(self.path)
+        restored.load()
+        self.assertEqual(restored.sessionId, sessionId)
+        self.assertNotEqual(restored.newSession(), sessionId)
+
+
+if __name__ == "__main__":
+    unittest.main()
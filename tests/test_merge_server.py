@@ -0,0 +1,61 @@
+import threading
+import unittest
+
+from RobotTinder import MergeClient
+from merge_server import makeServer
+
+
+class MergeServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = makeServer(port=0)
+        self.url = "http://127.0.0.1:{0}".format(self.server.server_address[1])
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_push_and_rank(self):
+        client = MergeClient(self.url, "a")
+        self.assertEqual(client.sync([[1, 2], [2, 3]]), 2)
+        state = self.server.state.getRanking()
+        self.assertEqual(state["comparisons"], 2)
+        self.assertEqual([row["team"] for row in state["ranking"]], [1, 2, 3])
+
+    def test_retry_is_not_counted_twice(self):
+        client = MergeClient(self.url, "a")
+        client.sync([[1, 2], [2, 3]])
+        client.sent = 0  # as if the answer to the first push got lost
+        self.assertEqual(client.sync([[1, 2], [2, 3], [3, 4]]), 3)
+        self.assertEqual(self.server.state.getScouts(), {"a": 3})
+
+    def test_restarted_scout_starts_a_new_session(self):
+        first = MergeClient(self.url, "a")
+        first.sync([[1, 2], [2, 3], [3, 4], [4, 5]])
+        second = MergeClient(self.url, "a")
+        comparisons = []
+        for i in ([5, 6], [6, 7], [7, 8]):
+            comparisons.append(i)
+            self.assertEqual(second.sync(comparisons), len(comparisons))
+        self.assertEqual(self.server.state.getScouts(), {"a": 7})
+        self.assertEqual(self.server.state.getRanking()["comparisons"], 7)
+
+    def test_restored_session_is_deduplicated(self):
+        first = MergeClient(self.url, "a")
+        first.sync([[1, 2], [2, 3]])
+        restored = MergeClient(self.url, "a", first.sessionId)
+        self.assertEqual(restored.sync([[1, 2], [2, 3], [3, 4]]), 3)
+        self.assertEqual(self.server.state.getScouts(), {"a": 3})
+
+    def test_scouts_are_weighted(self):
+        self.server.state.weights["lead"] = 3.
+        MergeClient(self.url, "lead").sync([[1, 2]])
+        MergeClient(self.url, "b").sync([[2, 1]])
+        ranking = self.server.state.getRanking()["ranking"]
+        self.assertEqual(ranking[0]["team"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import json
+import unittest
+
+from RobotTinder import MatchRow, ScoutData, buildTeamStats, pageJson
+
+
+def rejectConstant(name):
+    raise ValueError("not JSON: " + name)
+
+
+class PageJsonTest(unittest.TestCase):
+    def test_team_stats_are_strict_json(self):
+        # team 2 has no match rows, so its average is NaN, as is the one of stats["empty"]
+        rows = [MatchRow("1", "Q1", {"team": "1", "match": "Q1", "auto": "4"})]
+        data = ScoutData(["1", "2"], [["1", "2"]], [["Auto", "Numeric", "auto"]], [["1"], ["Auto", "Average"]], [],
+                         rows, [])
+        stats = json.loads(pageJson(buildTeamStats(data)), parse_constant=rejectConstant)
+        self.assertEqual(stats["teams"]["1"]["averages"], [4])
+        self.assertEqual(stats["teams"]["2"]["averages"], ["NaN"])
+        self.assertEqual(stats["empty"]["averages"], ["NaN"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,18 @@
+import itertools
+import unittest
+
+from RobotTinder import ClosestScorePairSelector, ComparisonLedger
+
+
+class ClosestScorePairSelectorTest(unittest.TestCase):
+    def test_complete_graph_repeats_the_closest_pair(self):
+        teams = [1, 2, 3, 4]
+        ledger = ComparisonLedger()
+        ledger.sync([list(pair) for pair in itertools.combinations(teams, 2)])
+        selector = ClosestScorePairSelector(ledger)
+        pair = selector.select(teams, [0., 1., 1.1, 3.])
+        self.assertEqual(set(pair), {2, 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
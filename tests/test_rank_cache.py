@@ -0,0 +1,55 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from RobotTinder import RankCache, makeEngine
+from tests.helpers import randomComparisons
+
+
+class RankCacheTest(unittest.TestCase):
+    def test_same_comparisons_in_another_order_hit(self):
+        cache = RankCache()
+        comparisons = randomComparisons(40, 300)
+        first = makeEngine(cache=cache)
+        first.sync(comparisons)
+        scores = dict(zip(first.teams, first.solve()))
+        shuffled = list(comparisons)
+        random.Random(1).shuffle(shuffled)
+        second = makeEngine(cache=cache)
+        second.sync(shuffled)
+        self.assertEqual(dict(zip(second.teams, second.solve())), scores)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_speculated_comparison_hits_after_the_click(self):
+        cache = RankCache()
+        engine = makeEngine(cache=cache)
+        engine.sync(randomComparisons(40, 300))
+        engine.solve()
+        teams, speculated = engine.speculate(3, 5)
+        hits = cache.hits
+        engine.addComparison(3, 5)
+        np.testing.assert_array_equal(engine.solve(), speculated)
+        self.assertEqual(cache.hits, hits + 1)
+
+    def test_disk_round_trip_and_pruning(self):
+        with tempfile.TemporaryDirectory() as directory:
+            comparisons = randomComparisons(20, 100)
+            cache = RankCache(directory=directory, diskSize=3)
+            engine = makeEngine(cache=cache)
+            for i in range(1, 6):
+                engine.sync(comparisons[:20 * i])
+                engine.solve()
+            self.assertEqual(len(os.listdir(directory)), 3)
+
+            reloaded = RankCache(directory=directory)
+            engine = makeEngine(cache=reloaded)
+            engine.sync(comparisons)
+            engine.solve()
+            self.assertEqual((reloaded.hits, reloaded.misses), (1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
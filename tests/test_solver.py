@@ -0,0 +1,65 @@
+import unittest
+import warnings
+
+import numpy as np
+import scipy.sparse
+
+from RobotTinder import SpringRank, build_from_sparse, solve_linear_system
+
+# scores of the original SpringRank code (sparse.COO gauge row, spsolve) for referenceComparisons
+referenceComparisons = [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (0, 2), (1, 3), (5, 0), (2, 1), (0, 3), (3, 5), (0, 1)]
+referenceScores = {
+    0.: [0.8251121076233184, 0.3094170403587444, 0.3901345291479821, 0.11659192825112105, 0.058295964125560595, 0.],
+    1.: [1.4412296564195297, 0.972875226039783, 1.0488245931283906, 0.8571428571428571, 0.8842676311030742,
+         0.7956600361663653],
+}
+
+
+def tournament(n, seed=0):
+    rng = np.random.default_rng(seed)
+    i, j = np.triu_indices(n, 1)
+    keep = rng.random(len(i)) < 0.3
+    return scipy.sparse.coo_matrix((np.ones(keep.sum()), (i[keep], j[keep])), shape=(n, n)).tocsr()
+
+
+def referenceGraph():
+    A = np.zeros((6, 6))
+    for better, worse in referenceComparisons:
+        A[better, worse] += 1
+    return A
+
+
+class SpringRankTest(unittest.TestCase):
+    def test_matches_the_original_implementation(self):
+        for alpha, expected in referenceScores.items():
+            for solver in ('auto', 'spsolve', 'bicgstab'):
+                rank = SpringRank(scipy.sparse.csr_matrix(referenceGraph()), alpha=alpha, solver=solver)
+                np.testing.assert_allclose(rank, expected, atol=1e-7)
+
+    def test_list_input_with_force_dense(self):
+        rank = SpringRank([[0, 1, 0], [0, 0, 1], [0, 0, 0]], force_dense=True)
+        np.testing.assert_allclose(rank, [2., 1., 0.], atol=1e-12)
+
+
+class SolveLinearSystemTest(unittest.TestCase):
+    def test_symmetric_solvers_are_not_used_on_the_bordered_system(self):
+        A, B = build_from_sparse(tournament(300), 0., 1., 1.)
+        reference = solve_linear_system(A, B, 'spsolve')
+        for solver in ('cg', 'minres'):
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                sol = solve_linear_system(A, B, solver)
+            self.assertTrue(any("symmetric" in str(i.message) for i in caught))
+            np.testing.assert_allclose(sol, reference, atol=1e-6)
+
+    def test_auto_accepts_the_lil_matrix_of_alpha_systems(self):
+        A, B = build_from_sparse(tournament(300), 1., 1., 1.)
+        diagnostics = {}
+        sol = solve_linear_system(A, B, 'auto', diagnostics=diagnostics)
+        self.assertEqual(diagnostics['solver'], 'cg')
+        self.assertEqual(diagnostics['info'], 0)
+        self.assertLess(np.linalg.norm(A @ sol - B), 1e-6 * np.linalg.norm(B))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+import scipy.sparse
+
+from RobotTinder import IncrementalSpringRank, SpringRank
+from tests.helpers import randomComparisons
+
+
+def referenceRank(engine, comparisons, alpha):
+    # SpringRank of the comparisons with the teams in engine order
+    n = len(engine.teams)
+    A = np.zeros((n, n))
+    for better, worse in comparisons:
+        A[engine.teamIndex[better], engine.teamIndex[worse]] += 1
+    return SpringRank(scipy.sparse.csr_matrix(A), alpha=alpha, solver='spsolve')
+
+
+def oneAtATime(comparisons, alpha):
+    engine = IncrementalSpringRank(alpha=alpha)
+    for k in range(1, len(comparisons) + 1):
+        engine.sync(comparisons[:k])
+        engine.solve()
+    return engine
+
+
+def batch(comparisons, alpha):
+    engine = IncrementalSpringRank(alpha=alpha)
+    engine.sync(comparisons)
+    engine.solve()
+    return engine
+
+
+class IncrementalSpringRankTest(unittest.TestCase):
+    # 30 teams are solved directly, 100 are above smallComponent and go through cg
+    sizes = [(30, 200), (100, 600)]
+
+    def test_matches_springrank_up_to_a_constant_with_alpha_0(self):
+        for teams, count in self.sizes:
+            comparisons = randomComparisons(teams, count)
+            for build in (oneAtATime, batch):
+                engine = build(comparisons, 0.)
+                self.assertEqual(engine.componentCount, 1)
+                expected = referenceRank(engine, comparisons, 0.)
+                np.testing.assert_allclose(engine.rank, expected - expected.mean(), atol=1e-6)
+                self.assertAlmostEqual(engine.rank.mean(), 0.)
+
+    def test_matches_springrank_with_alpha(self):
+        for teams, count in self.sizes:
+            comparisons = randomComparisons(teams, count)
+            for build in (oneAtATime, batch):
+                engine = build(comparisons, 1.)
+                np.testing.assert_allclose(engine.rank, referenceRank(engine, comparisons, 1.), atol=1e-6)
+
+    def test_every_component_has_mean_0(self):
+        first = randomComparisons(10, 40, seed=1)
+        second = [[better + 10, worse + 10] for better, worse in randomComparisons(10, 40, seed=2)]
+        comparisons = [pair for pairs in zip(first, second) for pair in pairs]
+        for build in (oneAtATime, batch):
+            engine = build(comparisons, 0.)
+            self.assertEqual(engine.componentCount, 2)
+            for component in (first, second):
+                teams = sorted({team for pair in component for team in pair})
+                members = [engine.teamIndex[team] for team in teams]
+                self.assertAlmostEqual(engine.rank[members].mean(), 0.)
+                alone = batch(component, 0.)
+                np.testing.assert_allclose(engine.rank[members], alone.rank[[alone.teamIndex[t] for t in teams]],
+                                           atol=1e-6)
+
+    def test_untouched_component_keeps_its_scores(self):
+        first = randomComparisons(10, 40, seed=1)
+        second = [[better + 10, worse + 10] for better, worse in randomComparisons(10, 40, seed=2)]
+        engine = batch(first + second, 0.)
+        members = [engine.teamIndex[team] for team in range(10, 20)]
+        before = engine.rank[members].copy()
+        engine.addComparison(3, 4)
+        self.assertEqual(engine.dirty, {engine.teamIndex[3], engine.teamIndex[4]})
+        engine.solve()
+        np.testing.assert_array_equal(engine.rank[members], before)
+        fresh = batch(first + second + [[3, 4]], 0.)
+        np.testing.assert_allclose(engine.rank, fresh.rank, atol=1e-8)
+
+    def test_speculate_leaves_the_engine_unchanged(self):
+        for teams, count in self.sizes:
+            comparisons = randomComparisons(teams, count)
+            engine = IncrementalSpringRank()
+            engine.sync(comparisons[:teams])
+            engine.solve()
+            for k in range(teams, count):
+                better, worse = comparisons[k]
+                engine.speculate(better, worse)
+                engine.speculate(worse, better)
+                engine.addComparison(better, worse)
+                engine.solve()
+            fresh = batch(comparisons, 0.)
+            self.assertEqual(engine.teams, fresh.teams)
+            np.testing.assert_allclose(engine.rank, fresh.rank, atol=1e-6)
+            self.assertEqual(engine.componentCount, fresh.componentCount)
+
+
+if __name__ == "__main__":
+    unittest.main()